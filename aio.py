@@ -0,0 +1,125 @@
+"""
+Модуль цикла asyncio рядом с циклом Tk
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional
+
+import tkinter as tk
+
+from config import AIO_IO_WORKERS
+
+# Обработчик результата: (результат, ошибка), вызывается в основном потоке Tk
+ResultHandler = Callable[[Any, Optional[BaseException]], None]
+
+
+class AsyncLoop(threading.Thread):
+    """
+    Цикл asyncio в фоновом потоке с мостом результатов в цикл Tk
+
+    Все сетевые операции проекта — корутины, работающие в этом цикле:
+    сколько бы запросов ни выполнялось одновременно, поток на каждый не
+    заводится. Блокирующие вызовы (requests, чтение файлов) уходят в
+    исполнитель по умолчанию, ограниченный AIO_IO_WORKERS потоками, через
+    asyncio.to_thread().
+
+    Результаты возвращаются в Tk через очередь: первый результат в пустой
+    очереди планирует один after(0), который вызывает все накопившиеся
+    обработчики в основном потоке.
+    """
+
+    def __init__(self, root: tk.Tk, workers: int = AIO_IO_WORKERS) -> None:
+        """
+        Args:
+            root: Главное окно, в цикле которого вызываются обработчики результатов
+            workers: Наибольшее количество потоков для блокирующих вызовов
+        """
+        super().__init__(name="asyncio", daemon=True)
+        self.root = root
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aio-io")
+        )
+        self._results: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._drain_scheduled = False
+
+    def run(self) -> None:
+        """Выполняет цикл asyncio до вызова stop()"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.close()
+
+    def submit(self, coro: Coroutine, on_done: Optional[ResultHandler] = None) -> Future:
+        """
+        Запускает корутину в цикле asyncio (из любого потока)
+
+        Args:
+            coro: Корутина
+            on_done: Обработчик результата, вызываемый в основном потоке Tk
+
+        Returns:
+            Future, по которому можно проверить завершение или отменить корутину
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if on_done is not None:
+            future.add_done_callback(lambda f: self._deliver(on_done, f))
+        return future
+
+    def call_in_tk(self, callback: Callable[..., None], *args: Any) -> None:
+        """
+        Вызывает функцию в основном потоке Tk (из любого потока)
+
+        Args:
+            callback: Функция
+            *args: Ее аргументы
+        """
+        self._results.put((callback, args))
+        with self._lock:
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        try:
+            self.root.after(0, self._drain)
+        except (RuntimeError, tk.TclError) as e:
+            # Цикл Tk еще не запущен или окно уже закрывается: обработчик
+            # остается в очереди, и следующий вызов снова попробует запланировать разбор
+            with self._lock:
+                self._drain_scheduled = False
+            logging.warning("Не удалось передать результат в цикл Tk: %s", e)
+
+    def stop(self) -> None:
+        """Отменяет незавершенные корутины и останавливает цикл"""
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def _deliver(self, on_done: ResultHandler, future: Future) -> None:
+        """Передает результат завершенной корутины обработчику в Tk"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        self.call_in_tk(on_done, None if error is not None else future.result(), error)
+
+    def _drain(self) -> None:
+        """Вызывает накопившиеся обработчики (основной поток Tk)"""
+        with self._lock:
+            self._drain_scheduled = False
+
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback(*args)
+            except Exception:
+                logging.exception("Ошибка обработчика результата")
@@ -0,0 +1,149 @@
+"""
+Модуль качества воздуха: PM2.5 и европейский индекс AQI от Open-Meteo
+"""
+
+import threading
+import time
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from config import (
+    AIR_QUALITY_URL,
+    AIR_QUALITY_TTL_SEC,
+    AIR_QUALITY_LEVELS,
+    WEATHER_CACHE_PRECISION,
+    WEATHER_MIN_REFETCH_SEC,
+)
+from http_client import client
+from providers import Coords
+
+
+class AirQualityReport(NamedTuple):
+    """Текущее качество воздуха"""
+    pm2_5: float            # Мелкодисперсные частицы PM2.5 (мкг/м³)
+    aqi: float              # Европейский индекс качества воздуха
+    fetched_at: float       # Время получения по системным часам (в секундах)
+    observed_at: float      # Время наблюдения по данным сервера (UNIX-время)
+    expires_at: float       # Время, после которого данные стоит запросить заново
+
+
+async def fetch_air_quality(coords: Sequence[Coords], url: str = AIR_QUALITY_URL) -> List[AirQualityReport]:
+    """
+    Запрашивает качество воздуха сразу для всех координат одним запросом
+
+    Args:
+        coords: Пары (широта, долгота)
+        url: Адрес API качества воздуха
+
+    Returns:
+        Отчеты в порядке coords
+
+    Raises:
+        requests.RequestException: При ошибке сети или HTTP
+        ValueError: При неожиданном формате ответа
+    """
+    response = await client.aget(
+        "air-quality",
+        url,
+        params={
+            "latitude": ",".join(str(lat) for lat, _ in coords),
+            "longitude": ",".join(str(lon) for _, lon in coords),
+            "current": "pm2_5,european_aqi",
+            "timeformat": "unixtime",
+        }
+    )
+    response.raise_for_status()
+
+    payload = response.json()
+    payloads = payload if isinstance(payload, list) else [payload]
+    if len(payloads) != len(coords):
+        raise ValueError(f"Ожидалось ответов: {len(coords)}, получено: {len(payloads)}")
+
+    now = time.time()
+    reports = []
+    for payload in payloads:
+        data = payload.get("current")
+        if not data:
+            raise ValueError("В ответе нет текущего качества воздуха")
+        observed_at = float(data.get("time", now))
+        reports.append(AirQualityReport(
+            pm2_5=data.get("pm2_5", "?"),
+            aqi=data.get("european_aqi", "?"),
+            fetched_at=now,
+            observed_at=observed_at,
+            # Новые данные появятся через период модели после наблюдения; если
+            # этот момент уже прошел, повторяем запрос не чаще WEATHER_MIN_REFETCH_SEC
+            expires_at=max(observed_at + AIR_QUALITY_TTL_SEC, now + WEATHER_MIN_REFETCH_SEC),
+        ))
+    return reports
+
+
+class AirQualityCache:
+    """
+    Кэш качества воздуха по округленным координатам
+
+    Модель качества воздуха обновляется раз в час, поэтому отчет живет
+    AIR_QUALITY_TTL_SEC от времени наблюдения независимо от кэша погоды,
+    а запрос уходит только за устаревшими точками.
+    """
+
+    def __init__(self, precision: int = WEATHER_CACHE_PRECISION, url: str = AIR_QUALITY_URL) -> None:
+        """
+        Args:
+            precision: Количество знаков после запятой при округлении координат
+            url: Адрес API качества воздуха
+        """
+        self.precision = precision
+        self.url = url
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._reports: Dict[Coords, AirQualityReport] = {}
+
+    async def get(self, coords: Sequence[Coords]) -> List[AirQualityReport]:
+        """
+        Возвращает качество воздуха для всех координат из кэша или от API
+
+        Args:
+            coords: Пары (широта, долгота)
+
+        Returns:
+            Отчеты в порядке coords
+
+        Raises:
+            requests.RequestException: При промахе и ошибке сети
+            ValueError: При неожиданном формате ответа
+        """
+        now = time.time()
+        keys = [(round(lat, self.precision), round(lon, self.precision)) for lat, lon in coords]
+
+        with self._lock:
+            stale = [
+                key for key in dict.fromkeys(keys)
+                if key not in self._reports or now >= self._reports[key].expires_at
+            ]
+            self.hits += len(keys) - len(stale)
+            self.misses += len(stale)
+
+        if stale:
+            reports = await fetch_air_quality(stale, self.url)
+            with self._lock:
+                self._reports.update(zip(stale, reports))
+
+        with self._lock:
+            return [self._reports[key] for key in keys]
+
+    def stats(self) -> Tuple[int, int]:
+        """Количество попаданий и промахов"""
+        with self._lock:
+            return self.hits, self.misses
+
+
+def format_air_quality(report: AirQualityReport) -> str:
+    """Текст качества воздуха для метки: «🟢 AQI 18 PM2.5 6.1»"""
+    icon = "⚪"
+    if isinstance(report.aqi, (int, float)):
+        for limit, level_icon in AIR_QUALITY_LEVELS:
+            icon = level_icon
+            if report.aqi <= limit:
+                break
+    return f"{icon} AQI {report.aqi} PM2.5 {report.pm2_5}"
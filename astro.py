@@ -0,0 +1,144 @@
+"""
+Модуль расчета восхода и заката Солнца по координатам (алгоритм NOAA)
+"""
+
+import math
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# Зенитное расстояние центра Солнца на восходе с учетом рефракции и радиуса диска
+SUNRISE_ZENITH = 90.833
+
+# Юлианская дата полуночи UTC дня с порядковым номером 0 (date.toordinal())
+_JD_ORDINAL_EPOCH = 1721424.5
+_JD_J2000 = 2451545.0
+
+
+class SunTimes(NamedTuple):
+    """Солнце в течение одних суток"""
+    sunrise: Optional[float]    # Восход (UNIX-время), None в полярный день или ночь
+    sunset: Optional[float]     # Закат (UNIX-время), None в полярный день или ночь
+    noon: float                 # Истинный полдень (UNIX-время)
+    day_length: float           # Продолжительность светового дня (в секундах)
+    polar: Optional[str]        # "day" или "night" для полярного дня или ночи
+
+
+def _solar_params(jd: float) -> Tuple[float, float]:
+    """
+    Склонение Солнца и уравнение времени по формулам NOAA
+
+    Args:
+        jd: Юлианская дата
+
+    Returns:
+        Склонение (в радианах) и уравнение времени (в минутах)
+    """
+    t = (jd - _JD_J2000) / 36525.0
+
+    mean_long = math.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anomaly = math.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccentricity = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = (
+        math.sin(mean_anomaly) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + math.sin(2 * mean_anomaly) * (0.019993 - 0.000101 * t)
+        + math.sin(3 * mean_anomaly) * 0.000289
+    )
+    omega = math.radians(125.04 - 1934.136 * t)
+    apparent_long = math.radians(
+        math.degrees(mean_long) + center - 0.00569 - 0.00478 * math.sin(omega)
+    )
+
+    mean_obliquity = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliquity = math.radians(mean_obliquity + 0.00256 * math.cos(omega))
+    declination = math.asin(math.sin(obliquity) * math.sin(apparent_long))
+
+    y = math.tan(obliquity / 2) ** 2
+    equation_of_time = 4 * math.degrees(
+        y * math.sin(2 * mean_long)
+        - 2 * eccentricity * math.sin(mean_anomaly)
+        + 4 * eccentricity * y * math.sin(mean_anomaly) * math.cos(2 * mean_long)
+        - 0.5 * y * y * math.sin(4 * mean_long)
+        - 1.25 * eccentricity * eccentricity * math.sin(2 * mean_anomaly)
+    )
+    return declination, equation_of_time
+
+
+def _event_minutes(lat: float, lon: float, jd_midnight: float, sign: int) -> Optional[float]:
+    """
+    Момент восхода (sign=-1) или заката (sign=+1) в минутах от полуночи UTC
+
+    Параметры Солнца уточняются на момент самого события (два приближения
+    от полудня), что дает точность около минуты.
+
+    Returns:
+        Минуты от полуночи UTC или None, если Солнце в эти сутки не пересекает горизонт
+    """
+    minutes = 720 - 4 * lon
+    for _ in range(2):
+        declination, equation_of_time = _solar_params(jd_midnight + minutes / 1440)
+        cos_hour_angle = (
+            math.cos(math.radians(SUNRISE_ZENITH)) / (math.cos(math.radians(lat)) * math.cos(declination))
+            - math.tan(math.radians(lat)) * math.tan(declination)
+        )
+        if not -1.0 <= cos_hour_angle <= 1.0:
+            return None
+        hour_angle = math.degrees(math.acos(cos_hour_angle))
+        minutes = 720 - 4 * (lon - sign * hour_angle) - equation_of_time
+    return minutes
+
+
+@lru_cache(maxsize=64)
+def _sun_times(lat: float, lon: float, ordinal: int) -> SunTimes:
+    """Расчет для одних суток (кэшируется: на точку достаточно одного расчета в день)"""
+    jd_midnight = _JD_ORDINAL_EPOCH + ordinal
+    midnight = datetime.combine(date.fromordinal(ordinal), datetime.min.time(), timezone.utc).timestamp()
+
+    _, equation_of_time = _solar_params(jd_midnight + (720 - 4 * lon) / 1440)
+    noon = midnight + (720 - 4 * lon - equation_of_time) * 60
+
+    rise = _event_minutes(lat, lon, jd_midnight, -1)
+    set_ = _event_minutes(lat, lon, jd_midnight, 1)
+    if rise is None or set_ is None:
+        # Солнце весь день выше или ниже горизонта: решает его высота в полдень
+        declination, _ = _solar_params(jd_midnight + (noon - midnight) / 86400)
+        altitude = 90 - abs(lat - math.degrees(declination))
+        polar = "day" if altitude > 90 - SUNRISE_ZENITH else "night"
+        return SunTimes(None, None, noon, 86400.0 if polar == "day" else 0.0, polar)
+
+    sunrise = midnight + rise * 60
+    sunset = midnight + set_ * 60
+    return SunTimes(sunrise, sunset, noon, sunset - sunrise, None)
+
+
+def local_solar_date(lon: float, moment: float) -> date:
+    """Дата по местному среднему солнечному времени (без данных о часовых поясах)"""
+    return datetime.fromtimestamp(moment + lon * 240, timezone.utc).date()
+
+
+def sun_times(lat: float, lon: float, moment: float) -> SunTimes:
+    """
+    Восход, закат и продолжительность дня для суток, в которые попадает момент
+
+    Сутки определяются по местному солнечному времени точки. Результат
+    кэшируется по округленным координатам и дате.
+
+    Args:
+        lat: Широта
+        lon: Долгота (восточная положительная)
+        moment: Момент времени (UNIX-время)
+
+    Returns:
+        Восход, закат, полдень и продолжительность дня
+    """
+    ordinal = local_solar_date(lon, moment).toordinal()
+    return _sun_times(round(lat, 2), round(lon, 2), ordinal)
+
+
+def is_daytime(lat: float, lon: float, moment: float) -> bool:
+    """Находится ли Солнце над горизонтом в точке в заданный момент"""
+    times = sun_times(lat, lon, moment)
+    if times.polar is not None:
+        return times.polar == "day"
+    return times.sunrise <= moment < times.sunset
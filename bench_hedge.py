@@ -0,0 +1,115 @@
+"""
+Бенчмарк хеджированных запросов погоды на локальных заглушках API
+
+Две заглушки отвечают в форматах Open-Meteo и MET Norway. Обычно ответ
+приходит за несколько десятков миллисекунд, но небольшая доля запросов
+«зависает» на сотни миллисекунд — как хвост задержек реального API.
+Сравниваются задержки одного основного источника и хеджированного
+запроса к обоим.
+
+Запуск:
+    python bench_hedge.py [количество_запросов] [доля_медленных]
+"""
+
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, List
+
+import numpy as np
+
+from providers import HedgedProvider, MetNorwayProvider, OpenMeteoProvider
+
+COORDS = [(60.17, 24.94)]
+
+OPEN_METEO_BODY = json.dumps({
+    "utc_offset_seconds": 10800,
+    "current_weather": {"time": "2026-01-01T12:00", "temperature": -3.5, "windspeed": 11.2, "weathercode": 3},
+}).encode()
+
+MET_NORWAY_BODY = json.dumps({
+    "properties": {"timeseries": [{
+        "time": "2026-01-01T09:00:00Z",
+        "data": {
+            "instant": {"details": {"air_temperature": -3.4, "wind_speed": 3.1}},
+            "next_1_hours": {"summary": {"symbol_code": "cloudy"}},
+        },
+    }]},
+}).encode()
+
+
+def _stub(body: bytes, slow_share: float, seed: int) -> ThreadingHTTPServer:
+    """Запускает заглушку API с тяжелым хвостом задержек"""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            with lock:
+                slow = rng.random() < slow_share
+                delay = rng.uniform(0.5, 1.0) if slow else rng.uniform(0.01, 0.03)
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _measure(fetch: Callable[[], Awaitable], number: int) -> List[float]:
+    """Задержки number последовательных запросов (в миллисекундах)"""
+    latencies = []
+    for _ in range(number):
+        started = time.perf_counter()
+        await fetch()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def _report(title: str, latencies: List[float]) -> None:
+    """Печатает квантили задержек"""
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+    print(f"{title:>16}: p50 {p50:7.1f}  p95 {p95:7.1f}  p99 {p99:7.1f}  макс {max(latencies):7.1f} мс")
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    slow_share = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+
+    open_meteo = _stub(OPEN_METEO_BODY, slow_share, seed=1)
+    met_norway = _stub(MET_NORWAY_BODY, slow_share, seed=2)
+    primary = OpenMeteoProvider(f"http://127.0.0.1:{open_meteo.server_port}/v1/forecast")
+    backup = MetNorwayProvider(f"http://127.0.0.1:{met_norway.server_port}/compact")
+    hedged = HedgedProvider((primary, backup))
+
+    print(f"Запросов: {number}, медленных ответов: {slow_share:.0%} (0.5–1 с)")
+    _report("только основной", asyncio.run(_measure(lambda: primary.fetch_current(COORDS), number)))
+    _report("хеджированный", asyncio.run(_measure(lambda: hedged.fetch_current(COORDS), number)))
+
+    stats = hedged.current.stats()
+    print(
+        f"Резервных запросов: {stats.hedged} ({stats.hedged / stats.calls:.1%} нагрузки), "
+        f"победы {stats.wins}, задержка резерва {stats.delay * 1000:.1f} мс"
+    )
+
+    open_meteo.shutdown()
+    met_norway.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Бенчмарк источников системных метрик: стоимость одного замера и сверка значений
+
+Запуск:
+    python bench_metrics.py [количество_замеров]
+"""
+
+import sys
+import timeit
+
+from metrics import PsutilBackend, ProcBackend
+
+
+def _sample(backend) -> None:
+    """Один замер: те же три чтения, что делает MetricsSampler за такт"""
+    backend.read_cpu()
+    backend.read_memory()
+    backend.read_net()
+    backend.read_counters()
+
+
+def _compare(proc: ProcBackend, ps: PsutilBackend) -> None:
+    """Сверяет значения обоих источников"""
+    print("Сверка значений (proc / psutil):")
+    print(f"  cpu_times: {proc.read_cpu()[0]}")
+    print(f"             {ps.read_cpu()[0]}")
+    print(f"  memory:    {proc.read_memory()}")
+    print(f"             {ps.read_memory()}")
+    for backend in (proc, ps):
+        names, counters = backend.read_net()
+        label = "  net:      " if backend is proc else "           "
+        print(f"{label} {dict(zip(names, counters.tolist()))}")
+    print(f"  counters:  {proc.read_counters()}")
+    print(f"             {ps.read_counters()}")
+
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    ps = PsutilBackend()
+    proc = ProcBackend()
+
+    try:
+        _compare(proc, ps)
+
+        results = {}
+        for backend in (ps, proc):
+            best = min(timeit.repeat(lambda: _sample(backend), number=number, repeat=5))
+            results[backend.name] = best / number * 1e6
+            print(f"{backend.name:>7}: {results[backend.name]:8.1f} мкс на замер")
+
+        saved = results["psutil"] - results["proc"]
+        print(f"Экономия: {saved:.1f} мкс на замер ({results['psutil'] / results['proc']:.1f}x)")
+
+    finally:
+        proc.close()
+
+
+if __name__ == "__main__":
+    main()
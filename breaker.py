@@ -0,0 +1,148 @@
+"""
+Модуль автоматических выключателей (circuit breaker) для внешних API
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import requests
+
+from config import HTTP_BREAKER_FAILURES, HTTP_BREAKER_BASE_SEC, HTTP_BREAKER_MAX_SEC
+
+
+CLOSED = "closed"           # Запросы идут как обычно
+OPEN = "open"               # Запросы отклоняются сразу, без обращения к сети
+HALF_OPEN = "half_open"     # Пропущен один пробный запрос, остальные отклоняются
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Запрос отклонен без обращения к сети: выключатель точки доступа разомкнут
+
+    Наследуется от requests.ConnectionError, поэтому существующие
+    обработчики сетевых ошибок перехватывают его без изменений.
+    """
+
+    def __init__(self, endpoint: str, retry_in: float) -> None:
+        super().__init__(f"API '{endpoint}' недоступно, повтор через {retry_in:.0f} с")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class BreakerState(NamedTuple):
+    """Состояние выключателя одной точки доступа"""
+    state: str              # CLOSED, OPEN или HALF_OPEN
+    failures: int           # Ошибок подряд
+    opened: int             # Размыканий подряд (степень паузы)
+    retry_in: float         # Секунд до пробного запроса (0, если замкнут)
+    rejected: int           # Отклонено запросов за время работы
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель одной точки доступа
+
+    После failures ошибок подряд выключатель размыкается, и все запросы
+    отклоняются сразу. По истечении паузы пропускается ровно один пробный
+    запрос: успех замыкает выключатель, ошибка снова размыкает его с
+    удвоенной паузой. Пауза случайно сдвигается в пределах [T/2, T], чтобы
+    клиенты не опрашивали восстановившийся сервер одновременно.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failures: int = HTTP_BREAKER_FAILURES,
+        base_sec: float = HTTP_BREAKER_BASE_SEC,
+        max_sec: float = HTTP_BREAKER_MAX_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            name: Имя точки доступа для логов и ошибок
+            failures: Количество ошибок подряд до размыкания
+            base_sec: Пауза после первого размыкания
+            max_sec: Наибольшая пауза
+            clock: Источник монотонного времени
+        """
+        self.name = name
+        self.threshold = failures
+        self.base_sec = base_sec
+        self.max_sec = max_sec
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened = 0
+        self._open_until = 0.0
+        self._rejected = 0
+
+    def allow(self) -> None:
+        """
+        Проверяет, можно ли выполнить запрос сейчас
+
+        Raises:
+            CircuitOpenError: Если выключатель разомкнут или пробный запрос уже выполняется
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+
+            now = self._clock()
+            if self._state == OPEN and now >= self._open_until:
+                self._state = HALF_OPEN
+                logging.info("API '%s': пробный запрос после паузы", self.name)
+                return
+
+            self._rejected += 1
+            raise CircuitOpenError(self.name, max(self._open_until - now, 0.0))
+
+    def success(self) -> None:
+        """Отмечает успешный запрос и замыкает выключатель"""
+        with self._lock:
+            if self._state != CLOSED:
+                logging.info("API '%s' снова доступно, отклонено запросов: %d", self.name, self._rejected)
+            self._state = CLOSED
+            self._failures = 0
+            self._opened = 0
+
+    def failure(self, error: object = None) -> None:
+        """
+        Отмечает неудачный запрос и при необходимости размыкает выключатель
+
+        Args:
+            error: Причина ошибки для лога
+        """
+        with self._lock:
+            self._failures += 1
+            # Ошибка запроса, начатого до размыкания, паузу не продлевает
+            if self._state == OPEN or (self._state == CLOSED and self._failures < self.threshold):
+                return
+
+            # Экспоненциальная пауза со случайным сдвигом в [T/2, T]
+            pause = min(self.base_sec * 2 ** self._opened, self.max_sec)
+            pause = random.uniform(pause / 2, pause)
+            self._opened += 1
+            self._state = OPEN
+            self._open_until = self._clock() + pause
+            logging.warning(
+                "API '%s' недоступно (%d ошибок подряд: %s), повтор через %.0f с",
+                self.name, self._failures, error, pause
+            )
+
+    def reset(self) -> None:
+        """Замыкает выключатель без пробного запроса (например, при появлении сети)"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opened = 0
+
+    def state(self) -> BreakerState:
+        """Текущее состояние выключателя"""
+        with self._lock:
+            retry_in = max(self._open_until - self._clock(), 0.0) if self._state == OPEN else 0.0
+            return BreakerState(self._state, self._failures, self._opened, retry_in, self._rejected)
@@ -0,0 +1,24 @@
+"""
+Сборка индекса встроенной таблицы городов для офлайн-геокодирования
+
+Запуск:
+    python build_cities.py [таблица.tsv] [индекс.bin]
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+from cities import build_index
+from config import CITIES_FILE
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else CITIES_FILE.with_suffix(".tsv")
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else CITIES_FILE
+    build_index(source, target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Модуль офлайн-геокодирования по встроенной таблице городов
+"""
+
+import csv
+import logging
+import mmap
+import struct
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from config import CITIES_FILE
+from geocache import normalize_name
+
+# Формат индекса (little-endian):
+#   заголовок — сигнатура, версия, число городов и ключей, смещения разделов;
+#   города — записи фиксированной длины в порядке таблицы;
+#   ключи — нормализованные названия и альтернативные имена, отсортированные
+#           по байтам UTF-8, со ссылкой на город;
+#   строки — UTF-8 названий городов и ключей подряд.
+_MAGIC = b"SGCT"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHHIIIII")      # magic, версия, резерв, городов, ключей, смещения городов, ключей, строк
+_CITY = struct.Struct("<ffIIH2s")          # широта, долгота, население, смещение и длина названия, страна
+_KEY = struct.Struct("<IHI")               # смещение и длина ключа, номер города
+
+
+class City(NamedTuple):
+    """Город из встроенной таблицы"""
+    name: str
+    country: str        # Код страны ISO 3166-1
+    lat: float
+    lon: float
+    population: int
+
+
+class CityIndex:
+    """
+    Поиск городов в отображенном в память индексе
+
+    Файл открывается при первом поиске, а операционная система подгружает
+    только затронутые страницы. Ключи отсортированы, поэтому точное
+    совпадение и совпадение по началу названия находятся двоичным поиском
+    без разбора всей таблицы.
+    """
+
+    def __init__(self, path: Path = CITIES_FILE) -> None:
+        """
+        Args:
+            path: Файл индекса, собранный build_index()
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        self._keys = _KeyView(self)
+        self.cities = 0
+        self.keys = 0
+        self._cities_offset = 0
+        self._keys_offset = 0
+        self._strings_offset = 0
+
+    def _open(self) -> mmap.mmap:
+        """Отображает индекс в память при первом обращении"""
+        with self._lock:
+            if self._map is None:
+                with self.path.open("rb") as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, _, cities, keys, cities_offset, keys_offset, strings_offset = (
+                    _HEADER.unpack_from(data, 0)
+                )
+                if magic != _MAGIC or version != _VERSION:
+                    data.close()
+                    raise ValueError(f"Неизвестный формат индекса городов: {self.path}")
+                self.cities, self.keys = cities, keys
+                self._cities_offset, self._keys_offset = cities_offset, keys_offset
+                self._strings_offset = strings_offset
+                self._map = data
+            return self._map
+
+    def _key(self, index: int) -> bytes:
+        """Ключ по номеру в отсортированном списке"""
+        offset, length, _ = _KEY.unpack_from(self._map, self._keys_offset + index * _KEY.size)
+        start = self._strings_offset + offset
+        return self._map[start:start + length]
+
+    def _city_id(self, index: int) -> int:
+        """Номер города для ключа по номеру"""
+        return _KEY.unpack_from(self._map, self._keys_offset + index * _KEY.size)[2]
+
+    def city(self, city_id: int) -> City:
+        """Город по номеру в таблице"""
+        data = self._open()
+        lat, lon, population, offset, length, country = _CITY.unpack_from(
+            data, self._cities_offset + city_id * _CITY.size
+        )
+        start = self._strings_offset + offset
+        # float32 хранит координаты с точностью ~1 м, лишние знаки отбрасываются
+        return City(
+            name=data[start:start + length].decode("utf-8"),
+            country=country.decode("ascii"),
+            lat=round(lat, 5),
+            lon=round(lon, 5),
+            population=population,
+        )
+
+    def lookup(self, name: str, prefix: bool = True) -> List[City]:
+        """
+        Города, одно из названий которых совпадает с name или начинается с него
+
+        Порядок повторяет выбор по ответу геокодирующего API: сначала точные
+        совпадения, затем совпадения по началу названия, внутри каждой
+        группы — по убыванию населения.
+
+        Args:
+            name: Название города (регистр и лишние пробелы не важны)
+            prefix: Искать и совпадения по началу названия
+
+        Returns:
+            Найденные города (пустой список, если совпадений нет)
+        """
+        key = normalize_name(name).encode("utf-8")
+        if not key:
+            return []
+        self._open()
+
+        exact, starts = set(), set()
+        index = bisect_left(self._keys, key)
+        while index < self.keys:
+            candidate = self._key(index)
+            if candidate == key:
+                exact.add(self._city_id(index))
+            elif prefix and candidate.startswith(key):
+                starts.add(self._city_id(index))
+            else:
+                break
+            index += 1
+
+        return (
+            sorted((self.city(i) for i in exact), key=lambda city: -city.population)
+            + sorted((self.city(i) for i in starts - exact), key=lambda city: -city.population)
+        )
+
+    def close(self) -> None:
+        """Освобождает отображение файла"""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+class _KeyView:
+    """Отсортированные ключи индекса как последовательность для bisect"""
+
+    def __init__(self, index: CityIndex) -> None:
+        self.index = index
+
+    def __len__(self) -> int:
+        return self.index.keys
+
+    def __getitem__(self, position: int) -> bytes:
+        return self.index._key(position)
+
+
+def build_index(source: Path, target: Path = CITIES_FILE) -> int:
+    """
+    Собирает индекс из таблицы TSV
+
+    Таблица содержит столбцы name, country, population, latitude, longitude
+    и alternate_names (через запятую); строки, начинающиеся с «#», пропускаются.
+
+    Args:
+        source: Исходная таблица
+        target: Файл индекса
+
+    Returns:
+        Количество городов
+    """
+    with source.open("r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(
+            (line for line in f if not line.startswith("#")),
+            delimiter="\t",
+            quoting=csv.QUOTE_NONE,
+        ))
+
+    strings = bytearray()
+    cities = bytearray()
+    keys = []
+
+    def add_string(value: bytes) -> int:
+        offset = len(strings)
+        strings.extend(value)
+        return offset
+
+    for city_id, row in enumerate(rows):
+        name = row["name"].encode("utf-8")
+        cities.extend(_CITY.pack(
+            float(row["latitude"]),
+            float(row["longitude"]),
+            int(row["population"]),
+            add_string(name),
+            len(name),
+            row["country"].encode("ascii"),
+        ))
+        names = [row["name"], *(row["alternate_names"] or "").split(",")]
+        for key in dict.fromkeys(normalize_name(n).encode("utf-8") for n in names if n.strip()):
+            keys.append((key, city_id))
+
+    keys.sort()
+    key_table = bytearray()
+    for key, city_id in keys:
+        key_table.extend(_KEY.pack(add_string(key), len(key), city_id))
+
+    cities_offset = _HEADER.size
+    keys_offset = cities_offset + len(cities)
+    strings_offset = keys_offset + len(key_table)
+    with target.open("wb") as f:
+        f.write(_HEADER.pack(
+            _MAGIC, _VERSION, 0, len(rows), len(keys), cities_offset, keys_offset, strings_offset
+        ))
+        f.write(cities)
+        f.write(key_table)
+        f.write(strings)
+
+    logging.info("Индекс городов: %d городов, %d названий -> %s", len(rows), len(keys), target)
+    return len(rows)
+
+
+# Общий индекс приложения
+index = CityIndex()
@@ -4,6 +4,7 @@
 
 import json
 import logging
+import socket
 import sys
 from pathlib import Path
 
@@ -11,15 +12,113 @@ from pathlib import Path
 API_URL = "https://api.open-meteo.com/v1/forecast" 
 GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search" 
 TRANSLATE_API = "https://translate.googleapis.com/translate_a/single" 
+IPAPI_URL = "https://ipapi.co/json/"
+AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+MET_NORWAY_URL = "https://api.met.no/weatherapi/locationforecast/2.0/compact"
+# MET Norway требует User-Agent с названием приложения и контактом
+MET_NORWAY_USER_AGENT = "SystemGlass/1.0 https://github.com/KostenkoV-V/SystemGlass"
+
+# ==== HTTP-клиент ====
+HTTP_POOL_SIZE = 4      # Соединений в пуле на один хост
+HTTP_POOL_TIMEOUT = 5   # Наибольшее ожидание свободного соединения из пула (в секундах)
+HTTP_RETRIES = 2        # Повторов при обрыве соединения, 429 и 5xx
+HTTP_TIMEOUTS = {       # Таймауты (подключение, чтение) в секундах по точкам доступа
+    "default": (3.05, 5),
+    "weather": (3.05, 5),
+    "met-norway": (3.05, 5),
+    "air-quality": (3.05, 5),
+    "geocode": (3.05, 5),
+    "translate": (3.05, 5),
+    "ipapi": (3.05, 5),
+}
+AIO_IO_WORKERS = 8          # Потоков для блокирующих вызовов из цикла asyncio (запросы, файлы)
+HTTP_BREAKER_FAILURES = 3   # Ошибок подряд до размыкания выключателя точки доступа
+HTTP_BREAKER_BASE_SEC = 15  # Пауза до первого пробного запроса
+HTTP_BREAKER_MAX_SEC = 900  # Наибольшая пауза между пробными запросами
+
+# ==== Доступность сети ====
+REACHABILITY_POLL_SEC = 5       # Период проверки маршрута, если netlink недоступен
+REACHABILITY_SETTLE_SEC = 0.5   # Ожидание окончания пачки событий netlink перед проверкой
+REACHABILITY_PROBE_ADDRS = (    # Адреса для проверки маршрута (пакеты не отправляются)
+    (socket.AF_INET, ("1.1.1.1", 53)),
+    (socket.AF_INET6, ("2606:4700:4700::1111", 53)),
+)
 
 # ==== Пути к файлам ====
 CONFIG_DIR = Path.home() / ".config" / "MyWeatherWidget"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+WEATHER_SNAPSHOT_FILE = CONFIG_DIR / "weather.json"
+GEOCODE_CACHE_FILE = CONFIG_DIR / "geocode.json"
+CITIES_FILE = Path(__file__).resolve().parent / "assets" / "cities.bin"
+
+# ==== Геокодирование ====
+GEOCODER = "auto"   # "auto" — встроенная таблица, затем API; "offline" — только таблица; "online" — только API
+TRANSLATE_FALLBACK = True   # Переводить кириллические названия через Google Translate, если транслитерация не найдена
+
+# ==== Кэш геокодирования ====
+GEOCODE_CACHE_SIZE = 256                    # Наибольшее количество названий в кэше
+GEOCODE_CACHE_TTL_SEC = 30 * 24 * 60 * 60   # Срок, после которого координаты перепроверяются
 
 # ==== Интервалы обновления ====
 WEATHER_INTERVAL_SEC = 10   # Обновление погоды каждые 10 секунд
+WEATHER_RENDER_INTERVAL_SEC = 1  # Прием результатов и обновление возраста погоды
 METRICS_INTERVAL_MS = 500   # Обновление метрик каждые 0.5 секунды
 
+# ==== Несколько точек погоды ====
+WEATHER_DISPLAY = "cycle"   # "cycle" — точки по очереди, "all" — все сразу
+WEATHER_CYCLE_SEC = 5       # Период переключения точек в режиме "cycle"
+WEATHER_SHOW_SUN = True     # Показывать восход и закат (считаются локально по координатам)
+
+# ==== Кэш погоды ====
+WEATHER_CACHE_PRECISION = 2         # Округление координат ключа кэша (~1 км)
+WEATHER_MODEL_INTERVAL_SEC = 15 * 60  # Период обновления текущей погоды у Open-Meteo
+WEATHER_MIN_REFETCH_SEC = 60        # Пауза между запросами, если сервер еще не обновил данные
+
+# ==== Качество воздуха ====
+AIR_QUALITY_ENABLED = True      # Показывать PM2.5 и AQI рядом с погодой
+AIR_QUALITY_TTL_SEC = 60 * 60   # Модель качества воздуха обновляется раз в час
+AIR_QUALITY_LEVELS = (          # Верхние границы европейского AQI и значки уровней
+    (20, "🟢"), (40, "🟡"), (60, "🟠"), (80, "🔴"), (100, "🟣"), (float("inf"), "🟤"),
+)
+
+# ==== Источники погоды ====
+WEATHER_PROVIDERS = ["open-meteo", "met-norway"]  # В порядке приоритета, первый — основной
+WEATHER_HEDGE = True            # Запрашивать резервный источник, если основной задерживается
+HEDGE_QUANTILE = 0.95           # Резервный запрос уходит после p95 задержек основного
+HEDGE_HISTORY = 50              # Количество последних задержек для оценки квантиля
+HEDGE_MIN_SAMPLES = 5           # Пока замеров меньше, используется задержка по умолчанию
+HEDGE_DEFAULT_DELAY_SEC = 1.0   # Задержка резервного запроса по умолчанию
+HEDGE_MIN_DELAY_SEC = 0.05      # Нижняя граница задержки резервного запроса
+
+# ==== Режим погоды ====
+WEATHER_MODE = "current"            # "current" — текущая погода, "forecast" — интерполяция прогноза
+WEATHER_FORECAST_STEP = "hourly"    # Шаг прогноза: "hourly" или "minutely_15"
+WEATHER_FORECAST_HOURS = 48         # Горизонт прогноза (в часах)
+WEATHER_FORECAST_REFRESH_SEC = 3 * 60 * 60  # Обновление прогноза раз в 3 часа
+
+# ==== Адаптивный опрос метрик ====
+METRICS_ADAPTIVE = True         # Менять период опроса в зависимости от активности
+METRICS_INTERVAL_MIN_MS = 100   # Нижняя граница периода при всплесках
+METRICS_INTERVAL_MAX_MS = 5000  # Верхняя граница периода в простое
+METRICS_ADAPTIVE_BACKOFF = 1.5  # Во сколько раз растет период на каждом стабильном замере
+METRICS_ADAPTIVE_THRESHOLDS = {
+    "cpu_percent": 5.0,     # Изменение загрузки CPU (в процентных пунктах)
+    "ram_percent": 1.0,     # Изменение использования RAM (в процентных пунктах)
+    "net_speed": 16.0,      # Изменение суммарной скорости сети (KB/s)
+}
+
+# ==== Сбор метрик ====
+METRICS_BACKEND = "auto"    # "proc" (Linux, чтение /proc), "psutil" или "auto"
+HISTORY_SECONDS = 24 * 60 * 60  # Глубина истории метрик (24 часа)
+HISTORY_TREND_BINS = 24         # Столбцов графика тренда в подсказке метрики (по часу на столбец)
+STATS_WINDOWS = (60, 5 * 60, 60 * 60)  # Окна скользящей статистики (1 мин, 5 мин, 1 ч)
+
+# Фильтры сетевых интерфейсов для суммарной скорости (шаблоны fnmatch)
+NET_INTERFACES_ALLOW = []   # Пусто — учитываются все интерфейсы
+NET_INTERFACES_DENY = [     # Loopback Linux и Windows, мосты Docker и libvirt, veth контейнеров
+    "lo", "Loopback Pseudo-Interface*", "docker*", "br-*", "veth*", "virbr*",
+]
+
 # ==== Настройки по умолчанию ====
 ALPHA_DEFAULT = 0.9
 CITY_DEFAULT = None
@@ -29,13 +128,16 @@ WEATHER_ICONS = {
     45: "🌫️", 48: "🌫️", 
     51: "🌦️", 52: "🌧️", 53: "🌧️", 54: "🌧️", 
     55: "🌧️", 56: "🌨️", 57: "🌨️", 61: "🌧️",
-    62: "🌧️", 63: "🌧️", 66: "🌨️", 67: "🌨️",
+    62: "🌧️", 63: "🌧️", 65: "🌧️", 66: "🌨️", 67: "🌨️",
     80: "🌧️", 81: "🌧️", 82: "🌧️",
-    71: "❄️", 72: "❄️", 73: "❄️", 
+    71: "❄️", 72: "❄️", 73: "❄️", 75: "❄️", 
     77: "🌨️", 85: "❄️", 86: "❄️",
     95: "⛈️", 96: "⛈️", 99: "⛈️"
 }
 
+# Значки, заменяющие дневные между закатом и восходом
+WEATHER_ICONS_NIGHT = {0: "🌙", 1: "🌙", 2: "☁️"}
+
 def setup_logging() -> None:
     """Настройка логирования в консоль"""
     logging.basicConfig(
@@ -53,6 +155,7 @@ def load_config() -> dict:
             "city": CITY_DEFAULT,
             "lat": None,
             "lon": None,
+            "locations": [],    # Дополнительные точки: {"name": ..., "lat": ..., "lon": ...}
             "alpha": ALPHA_DEFAULT
         }
         with CONFIG_FILE.open('w') as f:
@@ -0,0 +1,161 @@
+"""
+Модуль постоянного кэша геокодирования
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from config import GEOCODE_CACHE_FILE, GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL_SEC
+
+
+class GeocodeEntry(NamedTuple):
+    """Результат геокодирования названия"""
+    lat: float
+    lon: float
+    name: str               # Название выбранного совпадения
+    country: str            # Страна выбранного совпадения
+    stored_at: float        # Время сохранения (UNIX-время)
+
+
+def normalize_name(city: str) -> str:
+    """Ключ кэша: название без лишних пробелов, без учета регистра и «ё»"""
+    return " ".join(city.split()).casefold().replace("ё", "е")
+
+
+class GeocodeCache:
+    """
+    Кэш «нормализованное название -> координаты и выбранное совпадение»
+
+    Хранится в JSON-файле рядом с config.json и читается при первом
+    обращении. Записи упорядочены по давности использования, и этот
+    порядок сохраняется в файле вместе с ними: при превышении размера
+    вытесняются самые давние и после перезапуска. Записи старше ttl
+    считаются устаревшими — их стоит перепроверить через API, но при
+    недоступности сети можно использовать.
+    """
+
+    def __init__(
+        self,
+        path: Path = GEOCODE_CACHE_FILE,
+        size: int = GEOCODE_CACHE_SIZE,
+        ttl: float = GEOCODE_CACHE_TTL_SEC,
+    ) -> None:
+        """
+        Args:
+            path: Файл кэша
+            size: Наибольшее количество записей
+            ttl: Время жизни записи в секундах
+        """
+        self.path = path
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()     # Запись файла, отдельно от записей в памяти
+        self._entries: Optional["OrderedDict[str, GeocodeEntry]"] = None
+        self._dirty = False                     # Записи или их порядок изменились после save()
+
+    def _load(self) -> "OrderedDict[str, GeocodeEntry]":
+        """Записи кэша (файл читается один раз, вызывается под блокировкой)"""
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    for key, entry in json.load(f).items():
+                        self._entries[key] = GeocodeEntry(**entry)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                logging.warning("Кэш геокодирования поврежден: %s", e)
+                self._entries.clear()
+        return self._entries
+
+    def get(self, city: str) -> Optional[GeocodeEntry]:
+        """
+        Запись для названия (в том числе устаревшая)
+
+        Args:
+            city: Название в том виде, в каком его ввел пользователь
+
+        Returns:
+            Запись или None, если название еще не геокодировалось
+        """
+        key = normalize_name(city)
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            return entry
+
+    def is_fresh(self, entry: GeocodeEntry) -> bool:
+        """Проверяет, не истек ли срок жизни записи"""
+        return time.time() - entry.stored_at < self.ttl
+
+    def put(self, city: str, lat: float, lon: float, name: str = "", country: str = "") -> GeocodeEntry:
+        """
+        Сохраняет результат геокодирования в памяти
+
+        Чтобы изменения пережили перезапуск, после put() нужно вызвать save().
+
+        Returns:
+            Сохраненная запись
+        """
+        entry = GeocodeEntry(lat, lon, name, country, time.time())
+        key = normalize_name(city)
+        with self._lock:
+            entries = self._load()
+            entries[key] = entry
+            entries.move_to_end(key)
+            self._dirty = True
+            while len(entries) > self.size:
+                entries.popitem(last=False)
+        return entry
+
+    def discard(self, city: str) -> None:
+        """Удаляет запись для названия"""
+        with self._lock:
+            if self._load().pop(normalize_name(city), None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """
+        Записывает кэш на диск
+
+        Файл пишется во временный и атомарно переименовывается, чтобы
+        прерванная запись не оставила поврежденный кэш. Одновременные вызовы
+        из разных потоков пишут по очереди. Если записи и их порядок не
+        менялись с прошлого сохранения, файл не перезаписывается.
+        """
+        tmp_file = self.path.with_suffix(".tmp")
+
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {key: entry._asdict() for key, entry in self._load().items()}
+                self._dirty = False
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with tmp_file.open("w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.path)
+            except OSError as e:
+                logging.warning("Не удалось сохранить кэш геокодирования: %s", e)
+                with self._lock:
+                    self._dirty = True
+
+
+# Общий кэш приложения
+cache = GeocodeCache()
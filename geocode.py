@@ -2,17 +2,30 @@
 Модуль геокодирования и перевода
 """
 
-import re
+import asyncio
 import requests
+import struct
 import logging
+from collections import OrderedDict
 from typing import Tuple, List, Optional
 
 # Импорты из проекта
-from config import TRANSLATE_API, GEOCODE_URL
+from config import TRANSLATE_API, GEOCODE_URL, IPAPI_URL, GEOCODER, TRANSLATE_FALLBACK, GEOCODE_CACHE_SIZE
+from cities import City, index
+from geocache import cache
+from http_client import client
+from translit import has_cyrillic, transliterations
 
-def translate_ru_to_en(text: str) -> str:
+# Удачные переводы названий за время работы приложения (не больше GEOCODE_CACHE_SIZE).
+# Между запусками перевод не нужен: найденные по нему координаты хранит кэш геокодирования
+_translations: "OrderedDict[str, str]" = OrderedDict()
+
+async def translate_ru_to_en(text: str) -> str:
     """
     Переводит русский текст на английский через Google Translate API
+
+    Удачные переводы запоминаются до перезапуска: повторный перевод того
+    же текста не обращается к сети.
     
     Args:
         text: Текст на русском языке
@@ -28,19 +41,35 @@ def translate_ru_to_en(text: str) -> str:
         'q': text
     }
     
+    if text in _translations:
+        _translations.move_to_end(text)
+        return _translations[text]
+
     try:
-        response = requests.get(TRANSLATE_API, params=params, timeout=5)
+        response = await client.aget("translate", TRANSLATE_API, params=params)
         response.raise_for_status()
         data = response.json()
-        return ''.join([chunk[0] for chunk in data[0]])
+        _translations[text] = ''.join([chunk[0] for chunk in data[0]])
+        while len(_translations) > GEOCODE_CACHE_SIZE:
+            _translations.popitem(last=False)
+        return _translations[text]
         
     except Exception as e:
         logging.warning(f"Не удалось перевести '{text}': {e}")
         return text
 
-def geocode_city(city: str) -> Tuple[float, float]:
+async def geocode_city(city: str) -> Tuple[float, float]:
     """
     Получает координаты для указанного города
+
+    Повторные запросы того же названия обслуживаются постоянным кэшем
+    без обращения к сети. Устаревшая запись перепроверяется через API,
+    а при ошибке сети используется как есть.
+
+    Если GEOCODER не "online", сначала ищется точное совпадение во
+    встроенной таблице городов. В режиме "offline" сеть не используется
+    вовсе, а в режиме "auto" совпадение по началу названия из таблицы
+    выручает, когда API недоступно.
     
     Args:
         city: Название города (на русском или английском)
@@ -50,18 +79,149 @@ def geocode_city(city: str) -> Tuple[float, float]:
         
     Raises:
         ValueError: Если город не найден
+        requests.RequestException: При ошибке сети и отсутствии записи в кэше
+    """
+    entry = cache.get(city)
+    if entry is not None and cache.is_fresh(entry):
+        return entry.lat, entry.lon
+
+    if GEOCODER != "online":
+        found = _lookup_offline(city, prefix=GEOCODER == "offline")
+        if found:
+            return found[0].lat, found[0].lon
+        if GEOCODER == "offline":
+            raise ValueError(f"Город '{city}' не найден во встроенной таблице")
+
+    try:
+        location = await _geocode_remote(city)
+    except requests.RequestException as e:
+        if entry is not None:
+            logging.warning(f"Координаты '{city}' не перепроверены, используется кэш: {e}")
+            return entry.lat, entry.lon
+        found = _lookup_offline(city) if GEOCODER == "auto" else []
+        if not found:
+            raise
+        logging.warning(f"API геокодирования недоступно, для '{city}' выбран '{found[0].name}' из встроенной таблицы: {e}")
+        return found[0].lat, found[0].lon
+    except ValueError:
+        cache.discard(city)
+        raise
+
+    cache.put(city, location["latitude"], location["longitude"], location.get("name", ""), location.get("country", ""))
+    await asyncio.to_thread(cache.save)
+    return location["latitude"], location["longitude"]
+
+def _lookup_offline(city: str, prefix: bool = True) -> List[City]:
+    """
+    Поиск во встроенной таблице городов
+
+    Кириллическое название ищется среди альтернативных названий как есть,
+    а затем в транслитерации. Точное совпадение любого из вариантов
+    предпочтительнее совпадения по началу названия.
+
+    Returns:
+        Найденные города (пустой список, если совпадений нет или таблица недоступна)
+    """
+    names = [city, *transliterations(city)]
+    try:
+        for name in names:
+            found = index.lookup(name, prefix=False)
+            if found:
+                return found
+        if prefix:
+            for name in names:
+                found = index.lookup(name)
+                if found:
+                    return found
+    except (OSError, ValueError, struct.error) as e:
+        logging.warning(f"Встроенная таблица городов недоступна: {e}")
+    return []
+
+async def _geocode_remote(city: str) -> dict:
+    """
+    Запрашивает город у геокодирующего API
+
+    Кириллическое название запрашивается в транслитерации, все варианты
+    одновременно. Перевод через Google Translate (если TRANSLATE_FALLBACK)
+    нужен, только когда ни один вариант не совпал с названием из ответа.
+
+    Args:
+        city: Название города (на русском, украинском или английском)
+
+    Returns:
+        Выбранное совпадение из ответа API
+
+    Raises:
+        ValueError: Если город не найден
+        requests.RequestException: При ошибке сети или HTTP
+    """
+    if not has_cyrillic(city):
+        location, _ = await _search(city)
+        return location
+
+    # Варианты транслитерации запрашиваются одновременно: поиск длится
+    # один запрос, сколько бы вариантов ни было
+    names = transliterations(city)
+    results = await asyncio.gather(*(_search(name) for name in names), return_exceptions=True)
+
+    # Ответ без точного совпадения или совпадения по началу названия —
+    # лишь запасной вариант: API ищет нечетко и найдет хоть что-нибудь
+    found = []
+    errors = []
+    for name, result in zip(names, results):
+        if isinstance(result, requests.RequestException):
+            errors.append(result)
+        elif isinstance(result, BaseException) and not isinstance(result, ValueError):
+            raise result
+        elif not isinstance(result, ValueError):
+            found.append((result[1], name, result[0]))
+
+    # Лучшее совпадение, при равенстве — более вероятный вариант
+    best = min(found, key=lambda match: match[0], default=None)
+    if best is not None and best[0] < 2:
+        logging.info(f"Транслитерация города: '{city}' -> '{best[1]}'")
+        return best[2]
+    fallback = best[2] if best is not None else None
+
+    # Без ответа на часть вариантов выбор ненадежен: решит кэш или встроенная таблица
+    if errors:
+        raise errors[0]
+
+    if TRANSLATE_FALLBACK:
+        city_en = await translate_ru_to_en(city)
+        if city_en != city:
+            logging.info(f"Перевод города с русского: '{city}' -> '{city_en}'")
+            try:
+                location, _ = await _search(city_en)
+                return location
+            except ValueError:
+                if fallback is None:
+                    raise
+
+    if fallback is None:
+        raise ValueError(f"Город '{city}' не найден")
+    return fallback
+
+async def _search(city: str) -> Tuple[dict, int]:
     """
-    # Автоматический перевод при необходимости
-    if re.search('[\u0400-\u04FF]', city):
-        city_en = translate_ru_to_en(city)
-        logging.info(f"Перевод города с русского: '{city}' -> '{city_en}'")
-        city = city_en
+    Ищет название в геокодирующем API и выбирает совпадение
+
+    Args:
+        city: Название города латиницей
 
+    Returns:
+        Выбранное совпадение и его качество: 0 — точное, 1 — по началу
+        названия, 2 — первый результат
+
+    Raises:
+        ValueError: Если город не найден
+        requests.RequestException: При ошибке сети или HTTP
+    """
     # Запрос к геокодирующему API
-    response = requests.get(
+    response = await client.aget(
+        "geocode",
         GEOCODE_URL, 
-        params={"name": city, "count": 5}, 
-        timeout=5
+        params={"name": city, "count": 5}
     )
     response.raise_for_status()
     
@@ -75,17 +235,17 @@ def geocode_city(city: str) -> Tuple[float, float]:
     # 1. Точное совпадение
     for location in results:
         if location.get("name", "").strip().lower() == city_lower:
-            return location["latitude"], location["longitude"]
+            return location, 0
             
     # 2. Частичное совпадение
     for location in results:
         if location.get("name", "").strip().lower().startswith(city_lower):
-            return location["latitude"], location["longitude"]
+            return location, 1
             
     # 3. Первый результат как fallback
-    return results[0]["latitude"], results[0]["longitude"]
+    return results[0], 2
 
-def detect_city_by_ip() -> Optional[str]:
+async def detect_city_by_ip() -> Optional[str]:
     """
     Определяет город по IP-адресу
     
@@ -97,7 +257,7 @@ def detect_city_by_ip() -> Optional[str]:
         Альтернатива: https://ipapi.com/json/ 
     """
     try:
-        response = requests.get("https://ipapi.co/json/",  timeout=5)
+        response = await client.aget("ipapi", IPAPI_URL)
         response.raise_for_status()
         return response.json().get("city")
         
@@ -0,0 +1,202 @@
+"""
+Модуль хеджированных запросов: резервный запрос уходит, только если основной задерживается
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, TypeVar
+
+import numpy as np
+
+from config import (
+    HEDGE_QUANTILE,
+    HEDGE_HISTORY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY_SEC,
+    HEDGE_MIN_DELAY_SEC,
+)
+
+T = TypeVar("T")
+
+# Попытка — функция, создающая корутину запроса
+Attempt = Callable[[], Awaitable[T]]
+
+
+class HedgeStats(NamedTuple):
+    """Статистика хеджированных вызовов"""
+    calls: int              # Всего вызовов
+    hedged: int             # Вызовов, в которых был запущен резервный запрос
+    wins: Dict[str, int]    # Чей результат был использован, по именам попыток
+    delay: float            # Текущая задержка перед резервным запросом (в секундах)
+
+
+class LatencyTracker:
+    """Задержки последних успешных попыток для оценки квантиля"""
+
+    def __init__(self, size: int = HEDGE_HISTORY) -> None:
+        """
+        Args:
+            size: Количество хранимых последних задержек
+        """
+        self._samples: "deque[float]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        """Учитывает задержку успешной попытки"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = HEDGE_MIN_SAMPLES) -> Optional[float]:
+        """
+        Квантиль задержки по последним попыткам
+
+        Returns:
+            Квантиль в секундах или None, пока замеров меньше min_samples
+        """
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+        return float(np.quantile(samples, q))
+
+
+class Hedge:
+    """
+    Хеджированный вызов нескольких взаимозаменяемых попыток
+
+    Сначала запускается только первая (основная) попытка. Если за
+    задержку, равную квантилю HEDGE_QUANTILE ее недавних задержек, она не
+    завершилась, запускается следующая, и так далее. Побеждает первый
+    успешный результат, остальные попытки отменяются. Ошибка попытки сразу
+    запускает следующую, не дожидаясь задержки.
+
+    Отмена снимает только ожидание попытки. Блокирующий запрос внутри
+    asyncio.to_thread (HttpClient.aget) доработает в своем потоке и до
+    тех пор займет соединение из пула; ожидание соединения другими
+    запросами ограничено HTTP_POOL_TIMEOUT.
+
+    Отмененная попытка учитывается в задержках временем до отмены: это
+    нижняя оценка ее задержки, и медленные ответы не выпадают из квантиля.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        quantile: float = HEDGE_QUANTILE,
+        default_delay: float = HEDGE_DEFAULT_DELAY_SEC,
+        min_delay: float = HEDGE_MIN_DELAY_SEC,
+    ) -> None:
+        """
+        Args:
+            names: Имена попыток в порядке запуска (первая — основная)
+            quantile: Квантиль задержек основной попытки, после которого запускается следующая
+            default_delay: Задержка, пока замеров основной попытки недостаточно
+            min_delay: Нижняя граница задержки
+        """
+        self.names = tuple(names)
+        self.quantile = quantile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.trackers = [LatencyTracker() for _ in self.names]
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._hedged = 0
+        self._wins = dict.fromkeys(self.names, 0)
+
+    def delay(self) -> float:
+        """Задержка перед запуском следующей попытки (в секундах)"""
+        value = self.trackers[0].quantile(self.quantile)
+        if value is None:
+            value = self.default_delay
+        return max(value, self.min_delay)
+
+    async def call(self, attempts: Sequence[Attempt]) -> T:
+        """
+        Выполняет попытки с хеджированием и возвращает первый успешный результат
+
+        Args:
+            attempts: Попытки в порядке names
+
+        Returns:
+            Результат победившей попытки
+
+        Raises:
+            Exception: Ошибка первой неудачной попытки, если не удалась ни одна
+        """
+        loop = asyncio.get_running_loop()
+        tasks: Dict[asyncio.Task, int] = {}
+        pending = set()
+        errors: List[Exception] = []
+        delay = self.delay()
+        hedged = False
+
+        def launch() -> float:
+            index = len(tasks)
+            task = asyncio.ensure_future(self._timed(index, attempts[index]))
+            tasks[task] = index
+            pending.add(task)
+            return loop.time()
+
+        with self._lock:
+            self._calls += 1
+
+        try:
+            last_launch = launch()
+
+            while pending:
+                timeout = None
+                if len(tasks) < len(attempts):
+                    timeout = max(last_launch + delay - loop.time(), 0.0)
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                pending -= done
+                if not done:
+                    # Основная попытка дольше квантиля своих задержек — запускается резервная
+                    if not hedged:
+                        hedged = True
+                        with self._lock:
+                            self._hedged += 1
+                    logging.debug("Попытка '%s' задерживается, запуск резервной", self.names[len(tasks) - 1])
+                    last_launch = launch()
+                    continue
+
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+
+                    with self._lock:
+                        self._wins[self.names[tasks[task]]] += 1
+                    return result
+
+                # Все завершенные попытки неудачны: следующая запускается сразу
+                if len(tasks) < len(attempts):
+                    last_launch = launch()
+
+            raise errors[0]
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _timed(self, index: int, attempt: Attempt) -> T:
+        """Выполняет попытку и учитывает ее задержку"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            result = await attempt()
+        except asyncio.CancelledError:
+            self.trackers[index].add(loop.time() - started)
+            raise
+        self.trackers[index].add(loop.time() - started)
+        return result
+
+    def stats(self) -> HedgeStats:
+        """Статистика вызовов"""
+        with self._lock:
+            return HedgeStats(self._calls, self._hedged, dict(self._wins), self.delay())
@@ -0,0 +1,206 @@
+"""
+Модуль хранения истории системных метрик
+"""
+
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+from metrics import MetricsSnapshot
+
+# Метрики замера, история которых сохраняется по умолчанию
+HISTORY_FIELDS = ("cpu_percent", "ram_percent", "sent_speed", "recv_speed")
+
+# Символы графика тренда от наименьшего значения к наибольшему
+SPARKLINE_CHARS = "▁▂▃▄▅▆▇█"
+
+
+class RingBuffer:
+    """
+    Кольцевой буфер фиксированной емкости поверх заранее выделенного массива
+
+    Каждое значение пишется дважды — в позицию i и i + capacity, поэтому
+    последние n значений всегда лежат в массиве подряд и last() возвращает
+    срез-представление без копирования. Платой за это служит удвоенный
+    объем массива, который известен заранее и не растет.
+
+    Буфер рассчитан на одного писателя. Представления «живые»: если их нужно
+    хранить дольше одного такта опроса, их следует скопировать.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32) -> None:
+        """
+        Args:
+            capacity: Максимальное количество хранимых значений
+            dtype: Тип элементов (обычно float32 или float64)
+        """
+        if capacity <= 0:
+            raise ValueError("Емкость буфера должна быть положительной")
+
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=dtype)
+        self._head = 0      # Позиция следующей записи в диапазоне [0, capacity)
+        self._count = 0     # Количество записанных значений (не больше capacity)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти под данные буфера (в байтах)"""
+        return self._data.nbytes
+
+    def append(self, value: float) -> None:
+        """Добавляет значение за O(1), вытесняя самое старое при заполнении"""
+        head = self._head
+        self._data[head] = value
+        self._data[head + self.capacity] = value
+
+        self._head = head + 1 if head + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Возвращает последние n значений в порядке от старых к новым
+
+        Args:
+            n: Количество значений (по умолчанию все сохраненные)
+
+        Returns:
+            Представление массива без копирования
+        """
+        n = self._count if n is None else max(0, min(n, self._count))
+        end = self._head + self.capacity
+        return self._data[end - n:end]
+
+
+class MetricsHistory:
+    """
+    История замеров метрик: по кольцевому буферу на каждую метрику
+
+    Метки времени хранятся в float64 по монотонным часам, значения метрик
+    в float32, так что объем памяти определяется только емкостью.
+
+    Если задан min_interval, история прореживается по времени: замеры
+    чаще сетки с этим шагом пропускаются. Адаптивный опрос может ускоряться
+    в разы, а глубина истории в секундах остается capacity * min_interval.
+    """
+
+    def __init__(
+        self, capacity: int, fields: Iterable[str] = HISTORY_FIELDS, min_interval: float = 0.0
+    ) -> None:
+        """
+        Args:
+            capacity: Количество хранимых замеров на метрику
+            fields: Имена полей MetricsSnapshot, историю которых нужно хранить
+            min_interval: Шаг сетки хранимых замеров (в секундах, 0 — хранить все)
+        """
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self._next_due = float("-inf")
+        self._timestamps = RingBuffer(capacity, np.float64)
+        self._series: Dict[str, RingBuffer] = {
+            field: RingBuffer(capacity, np.float32) for field in fields
+        }
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        """Суммарный объем памяти под историю (в байтах)"""
+        return self._timestamps.nbytes + sum(buf.nbytes for buf in self._series.values())
+
+    def append(self, snapshot: MetricsSnapshot) -> None:
+        """Сохраняет значения метрик из замера (если он не чаще min_interval)"""
+        if self.min_interval:
+            # Допуск в полшага, чтобы джиттер обычного опроса не выбрасывал замеры
+            if snapshot.timestamp < self._next_due - self.min_interval / 2:
+                return
+            # Сетка сдвигается к замеру только после пропуска длиннее шага
+            if snapshot.timestamp - self._next_due > self.min_interval:
+                self._next_due = snapshot.timestamp
+            self._next_due += self.min_interval
+
+        for field, buf in self._series.items():
+            buf.append(getattr(snapshot, field))
+        # Метка времени пишется последней: читатель не увидит ее раньше значений
+        self._timestamps.append(snapshot.timestamp)
+
+    def _count_since(self, seconds: float) -> int:
+        """Количество последних замеров, попадающих в окно длиной seconds"""
+        timestamps = self._timestamps.last()
+        if not len(timestamps):
+            return 0
+
+        start = np.searchsorted(timestamps, timestamps[-1] - seconds, side="left")
+        return len(timestamps) - int(start)
+
+    def timestamps(self, seconds: float) -> np.ndarray:
+        """
+        Метки времени замеров за последние seconds секунд
+
+        Returns:
+            Представление без копирования (монотонное время, в секундах)
+        """
+        return self._timestamps.last(self._count_since(seconds))
+
+    def last(self, field: str, seconds: float) -> np.ndarray:
+        """
+        Значения метрики за последние seconds секунд
+
+        Args:
+            field: Имя метрики (поле MetricsSnapshot)
+            seconds: Длина окна относительно последнего замера
+
+        Returns:
+            Представление без копирования в порядке от старых к новым
+        """
+        return self._series[field].last(self._count_since(seconds))
+
+    def binned_mean(self, field: str, seconds: float, bins: int) -> np.ndarray:
+        """
+        Средние значения метрики по равным интервалам окна
+
+        Args:
+            field: Имя метрики (поле MetricsSnapshot)
+            seconds: Длина окна относительно последнего замера
+            bins: Количество интервалов
+
+        Returns:
+            Массив длиной bins от старых интервалов к новым (NaN — интервал без замеров)
+        """
+        timestamps = self.timestamps(seconds)
+        values = self.last(field, seconds)
+        # Между двумя вызовами мог добавиться замер: выравниваем по последним
+        n = min(len(timestamps), len(values))
+        if not n:
+            return np.full(bins, np.nan)
+        timestamps, values = timestamps[-n:], values[-n:]
+
+        start = timestamps[-1] - seconds
+        index = ((timestamps - start) * (bins / seconds)).astype(np.int64)
+        np.clip(index, 0, bins - 1, out=index)
+        counts = np.bincount(index, minlength=bins)
+        sums = np.bincount(index, weights=values, minlength=bins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+
+def sparkline(values: np.ndarray) -> str:
+    """
+    Текстовый график ряда: «▁▂▅█▇▃»
+
+    Высота символа масштабируется между наименьшим и наибольшим значением
+    ряда, пропуски (NaN) выводятся пробелом.
+    """
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return " " * len(values)
+
+    low, high = float(np.min(values[valid])), float(np.max(values[valid]))
+    scale = (len(SPARKLINE_CHARS) - 1) / (high - low) if high > low else 0.0
+    return "".join(
+        SPARKLINE_CHARS[int(round((value - low) * scale))] if ok else " "
+        for value, ok in zip(values.tolist(), valid.tolist())
+    )
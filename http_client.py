@@ -0,0 +1,230 @@
+"""
+Модуль общего HTTP-клиента с пулом соединений
+"""
+
+import asyncio
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, NamedTuple, Optional
+
+from breaker import BreakerState, CircuitBreaker
+from config import HTTP_POOL_SIZE, HTTP_POOL_TIMEOUT, HTTP_RETRIES, HTTP_TIMEOUTS
+
+
+class PoolStats(NamedTuple):
+    """Статистика пула соединений к одному хосту"""
+    requests: int       # Выполнено запросов
+    connections: int    # Открыто новых соединений (TCP + TLS)
+    reused: int         # Запросов по уже открытому соединению
+
+
+class OfflineError(requests.ConnectionError):
+    """Запрос отклонен без обращения к сети: маршрута во внешнюю сеть нет"""
+
+    def __init__(self, endpoint: str) -> None:
+        super().__init__(f"Нет сети, запрос к API '{endpoint}' не выполнен")
+        self.endpoint = endpoint
+
+
+class _BoundedWaitPool(HTTPConnectionPool):
+    """Пул, в котором ожидание свободного соединения ограничено HTTP_POOL_TIMEOUT"""
+
+    pool_timeout: Optional[float] = HTTP_POOL_TIMEOUT
+
+    def _get_conn(self, timeout: Optional[float] = None):
+        return super()._get_conn(timeout=self.pool_timeout if timeout is None else timeout)
+
+
+class _BoundedWaitHTTPSPool(_BoundedWaitPool, HTTPSConnectionPool):
+    """HTTPS-пул с ограниченным ожиданием соединения"""
+
+
+class _BoundedWaitAdapter(HTTPAdapter):
+    """
+    Адаптер с блокирующим пулом и ограниченным ожиданием соединения
+
+    requests не передает пулу таймаут ожидания, поэтому при pool_block=True
+    запрос ждал бы соединения сколько угодно долго — например, пока поток
+    отмененной хеджированной попытки заканчивает запрос со всеми повторами.
+    """
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _BoundedWaitPool,
+            "https": _BoundedWaitHTTPSPool,
+        }
+
+    def send(self, request: requests.PreparedRequest, *args, **kwargs) -> requests.Response:
+        try:
+            return super().send(request, *args, **kwargs)
+        except EmptyPoolError as e:
+            raise requests.ConnectionError(
+                f"Нет свободного соединения к {e.pool.host} за {e.pool.pool_timeout} с", request=request
+            ) from e
+
+
+class HttpClient:
+    """
+    Общий HTTP-клиент для всех внешних запросов проекта
+
+    Одна requests.Session держит keep-alive соединения в пуле на каждый
+    хост, поэтому повторные запросы не платят за TCP- и TLS-рукопожатие.
+    Временные ошибки (обрыв соединения, 429, 5xx) повторяются с
+    экспоненциальной паузой, таймауты задаются отдельно для каждой точки
+    доступа. Каждая точка доступа защищена своим выключателем: во время
+    сбоя запросы отклоняются сразу, не дожидаясь таймаутов. Так же сразу
+    отклоняются все запросы, пока функция online сообщает об отсутствии сети.
+    """
+
+    def __init__(
+        self,
+        timeouts: Dict[str, tuple] = HTTP_TIMEOUTS,
+        retries: int = HTTP_RETRIES,
+        pool_size: int = HTTP_POOL_SIZE,
+    ) -> None:
+        """
+        Args:
+            timeouts: Таймауты (подключение, чтение) по именам точек доступа
+            retries: Количество повторов временных ошибок
+            pool_size: Наибольшее количество соединений к одному хосту
+        """
+        self.timeouts = timeouts
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Проверка доступности сети, подключается ReachabilityMonitor
+        self.online: Callable[[], bool] = lambda: True
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False,
+        )
+        # Лишние одновременные запросы к хосту ждут свободного соединения из
+        # пула (не дольше HTTP_POOL_TIMEOUT), а не открывают новые, которые
+        # потом закрываются
+        self._adapter = _BoundedWaitAdapter(
+            pool_connections=8, pool_maxsize=pool_size, max_retries=retry, pool_block=True
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def get(self, endpoint: str, url: str, params: Optional[dict] = None, **kwargs) -> requests.Response:
+        """
+        Выполняет GET-запрос через общий пул соединений
+
+        Args:
+            endpoint: Имя точки доступа (ключ HTTP_TIMEOUTS), например "weather"
+            url: Адрес запроса
+            params: Параметры строки запроса
+
+        Returns:
+            Ответ сервера
+
+        Raises:
+            OfflineError: Если сети нет
+            breaker.CircuitOpenError: Если выключатель точки доступа разомкнут
+            requests.RequestException: При ошибке сети после всех повторов
+        """
+        kwargs.setdefault("timeout", self.timeouts.get(endpoint, self.timeouts["default"]))
+        # Отказ из-за отсутствия сети не считается сбоем точки доступа
+        if not self.online():
+            raise OfflineError(endpoint)
+
+        breaker = self.breaker(endpoint)
+        breaker.allow()
+
+        try:
+            response = self.session.get(url, params=params, **kwargs)
+        except requests.RequestException as e:
+            breaker.failure(e)
+            raise
+        except BaseException:
+            # Пробный запрос не должен навсегда оставить выключатель полуоткрытым
+            breaker.failure()
+            raise
+
+        # Ошибки сервера после всех повторов тоже считаются сбоем точки доступа
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.failure(f"HTTP {response.status_code}")
+        else:
+            breaker.success()
+        return response
+
+    async def aget(self, endpoint: str, url: str, params: Optional[dict] = None, **kwargs) -> requests.Response:
+        """
+        Корутина GET-запроса для цикла asyncio
+
+        Сам запрос выполняется через get() в ограниченном исполнителе цикла,
+        поэтому пул соединений, повторы и выключатели общие для обоих способов.
+
+        Отмена корутины не прерывает запрос: поток исполнителя доводит его
+        до конца (с повторами) и до тех пор занимает соединение из пула.
+        """
+        return await asyncio.to_thread(self.get, endpoint, url, params, **kwargs)
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """Выключатель точки доступа (создается при первом обращении)"""
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(endpoint)
+            return self._breakers[endpoint]
+
+    def reset_breakers(self) -> None:
+        """Замыкает все выключатели: ошибки были вызваны отсутствием сети"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        for breaker in breakers:
+            breaker.reset()
+
+    def breaker_states(self) -> Dict[str, BreakerState]:
+        """Состояния выключателей по точкам доступа"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.state() for endpoint, breaker in breakers.items()}
+
+    def stats(self) -> Dict[str, PoolStats]:
+        """
+        Статистика переиспользования соединений по хостам
+
+        Returns:
+            Словарь «хост -> PoolStats»
+        """
+        result = {}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            result[pool.host] = PoolStats(
+                requests=pool.num_requests,
+                connections=pool.num_connections,
+                reused=max(pool.num_requests - pool.num_connections, 0),
+            )
+        return result
+
+    def log_stats(self) -> None:
+        """Записывает в лог статистику переиспользования соединений"""
+        for host, stats in self.stats().items():
+            logging.info(
+                "HTTP %s: запросов %d, новых соединений %d, переиспользовано %d",
+                host, stats.requests, stats.connections, stats.reused
+            )
+        for endpoint, state in self.breaker_states().items():
+            logging.info(
+                "API %s: состояние %s, размыканий подряд %d, отклонено запросов %d",
+                endpoint, state.state, state.opened, state.rejected
+            )
+
+
+# Общий клиент для всех модулей проекта
+client = HttpClient()
@@ -2,55 +2,737 @@
 Модуль работы с системными метриками
 """
 
+import fnmatch
+import logging
+import os
+import numpy as np
 import psutil
+import sys
+import threading
 import time
-from typing import Tuple
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from config import (
+    METRICS_BACKEND,
+    METRICS_ADAPTIVE_BACKOFF,
+    METRICS_ADAPTIVE_THRESHOLDS,
+    NET_INTERFACES_ALLOW,
+    NET_INTERFACES_DENY,
+)
+from rates import RateEngine
+from scheduler import next_deadline
 
-# Типы для аннотаций
-NetworkStats = psutil._common.snetio
 Timestamp = float
 
-def init_counters() -> Tuple[NetworkStats, Timestamp]:
+# Разрядность счетчиков unsigned long в ядре (для обнаружения переполнения)
+KERNEL_COUNTER_BITS = 64 if sys.maxsize > 2 ** 32 else 32
+
+# Размер сектора в /proc/diskstats (всегда 512 байт, как и в psutil)
+DISK_SECTOR_SIZE = 512
+
+
+class CpuTimes(NamedTuple):
+    """Сырые счетчики времени CPU (в секундах)"""
+    user: float
+    nice: float
+    system: float
+    idle: float
+    iowait: float
+    irq: float
+    softirq: float
+    steal: float
+    guest: float
+    guest_nice: float
+
+
+# Индексы столбцов в массиве счетчиков по ядрам (порядок полей CpuTimes)
+_USER, _NICE, _SYSTEM, _IDLE, _IOWAIT, _IRQ, _SOFTIRQ, _STEAL, _GUEST, _GUEST_NICE = range(10)
+
+
+class CpuSplit(NamedTuple):
+    """Распределение времени CPU по видам нагрузки (в процентах)"""
+    user: float         # user + nice
+    system: float       # system + irq + softirq
+    iowait: float
+    steal: float
+
+
+class MemoryStats(NamedTuple):
+    """Показатели памяти, нужные виджету"""
+    total: int          # Всего памяти (в байтах)
+    available: int      # Доступно без вытеснения (в байтах)
+    percent: float      # Использование (в процентах)
+
+
+class NetworkStats(NamedTuple):
+    """Сырые сетевые счетчики (порядок полей как у psutil.net_io_counters)"""
+    bytes_sent: int
+    bytes_recv: int
+    packets_sent: int
+    packets_recv: int
+    errin: int
+    errout: int
+    dropin: int
+    dropout: int
+
+
+class SystemCounters(NamedTuple):
+    """Монотонные счетчики ядра (сырые значения или скорости в секунду)"""
+    ctx_switches: float
+    interrupts: float
+    page_faults: float
+    major_faults: float
+    disk_read_bytes: float
+    disk_write_bytes: float
+
+
+# Индексы столбцов в массиве счетчиков по интерфейсам (порядок полей NetworkStats)
+_BYTES_SENT, _BYTES_RECV = 0, 1
+
+# Столбцы /proc/net/dev в порядке полей NetworkStats
+_PROC_NET_COLUMNS = [8, 0, 9, 1, 2, 10, 3, 11]
+
+
+class MetricsSnapshot(NamedTuple):
     """
-    Инициализирует начальные значения для отслеживания сетевой активности
-    
+    Неизменяемый замер системных метрик за один такт
+
+    Сырые счетчики читаются ровно один раз за такт и сохраняются в замере,
+    чтобы следующий такт считал разности именно от них.
+    """
+    timestamp: Timestamp      # Время замера по монотонным часам (в секундах)
+    cpu_times: CpuTimes       # Сырые счетчики времени CPU
+    core_times: np.ndarray    # Сырые счетчики по ядрам, форма (ядра, 10)
+    memory: MemoryStats       # Сырые показатели памяти
+    net: NetworkStats         # Сырые счетчики, суммированные по выбранным интерфейсам
+    nic_names: Tuple[str, ...]  # Имена сетевых интерфейсов
+    nic_counters: np.ndarray  # Сырые счетчики интерфейсов, форма (интерфейсы, 8)
+    nic_rates: np.ndarray     # Скорости по счетчикам интерфейсов (в секунду)
+    nic_selected: np.ndarray  # Маска интерфейсов, прошедших фильтр
+    counters: SystemCounters  # Сырые счетчики ядра
+    counter_rates: SystemCounters  # Скорости счетчиков ядра (в секунду)
+    cpu_percent: float        # Загрузка CPU с прошлого замера (в процентах)
+    core_percent: np.ndarray  # Загрузка каждого ядра (в процентах)
+    cpu_split: CpuSplit       # Распределение загрузки по видам (в процентах)
+    ram_percent: float        # Использование RAM (в процентах)
+    sent_speed: float         # Скорость отправки данных (KB/s)
+    recv_speed: float         # Скорость получения данных (KB/s)
+
+    @property
+    def cpu_max_core(self) -> float:
+        """Загрузка самого нагруженного ядра (в процентах)"""
+        return float(self.core_percent.max()) if len(self.core_percent) else 0.0
+
+
+class InterfaceFilter:
+    """
+    Фильтр сетевых интерфейсов по шаблонам имен (fnmatch)
+
+    Решение по каждому имени кэшируется, а маска пересчитывается только при
+    изменении набора интерфейсов, поэтому сотни veth-интерфейсов не
+    добавляют работы в обычный такт. Решения для исчезнувших интерфейсов
+    удаляются вместе с пересчетом маски, и кэш не растет при их смене.
+    """
+
+    def __init__(self, allow: Iterable[str] = NET_INTERFACES_ALLOW, deny: Iterable[str] = NET_INTERFACES_DENY) -> None:
+        """
+        Args:
+            allow: Шаблоны разрешенных интерфейсов (пусто — разрешены все)
+            deny: Шаблоны исключаемых интерфейсов (проверяются после allow)
+        """
+        self.allow = tuple(allow)
+        self.deny = tuple(deny)
+        self._decisions: Dict[str, bool] = {}
+        self._names: Optional[Tuple[str, ...]] = None
+        self._mask = np.zeros(0, dtype=bool)
+
+    def accepts(self, name: str) -> bool:
+        """Проверяет, проходит ли интерфейс фильтр"""
+        decision = self._decisions.get(name)
+        if decision is None:
+            allowed = not self.allow or any(fnmatch.fnmatchcase(name, p) for p in self.allow)
+            decision = allowed and not any(fnmatch.fnmatchcase(name, p) for p in self.deny)
+            self._decisions[name] = decision
+        return decision
+
+    def mask(self, names: Tuple[str, ...]) -> np.ndarray:
+        """Булева маска интерфейсов, прошедших фильтр, выровненная по names"""
+        if names != self._names:
+            self._names = names
+            self._mask = np.array([self.accepts(name) for name in names], dtype=bool)
+            if len(self._decisions) > len(names):
+                present = set(names)
+                self._decisions = {n: d for n, d in self._decisions.items() if n in present}
+            self._mask.flags.writeable = False
+        return self._mask
+
+
+def _cpu_total(times: CpuTimes) -> float:
+    """Суммарное время CPU (guest уже учтено в user/nice на Linux)"""
+    total = sum(times)
+    total -= getattr(times, "guest", 0)
+    total -= getattr(times, "guest_nice", 0)
+    return total
+
+
+def _cpu_busy(times: CpuTimes) -> float:
+    """Время, когда CPU был занят (без простоя и ожидания ввода-вывода)"""
+    return _cpu_total(times) - times.idle - getattr(times, "iowait", 0)
+
+
+def cpu_percent_between(prev: CpuTimes, current: CpuTimes) -> float:
+    """
+    Рассчитывает загрузку CPU между двумя замерами счетчиков
+
+    Args:
+        prev: Счетчики предыдущего замера
+        current: Счетчики текущего замера
+
     Returns:
-        Кортеж из:
-        - Текущих сетевых счетчиков
-        - Текущего времени в секундах
+        Загрузка CPU в процентах (по той же формуле, что psutil.cpu_percent)
     """
-    return psutil.net_io_counters(), time.time()
+    busy_delta = _cpu_busy(current) - _cpu_busy(prev)
+    total_delta = _cpu_total(current) - _cpu_total(prev)
+
+    if busy_delta <= 0 or total_delta <= 0:
+        return 0.0
+
+    return round(min(busy_delta / total_delta * 100, 100.0), 1)
+
 
-def update_metrics(last_net: NetworkStats, last_time: Timestamp) -> Tuple[float, float, float, float, Timestamp]:
+def core_usage_between(prev: np.ndarray, current: np.ndarray) -> Tuple[np.ndarray, CpuSplit]:
     """
-    Обновляет системные метрики и рассчитывает сетевую активность
-    
+    Рассчитывает загрузку каждого ядра и распределение нагрузки
+
+    Все ядра обрабатываются одной операцией над массивами, без цикла
+    по ядрам, поэтому стоимость такта почти не зависит от их количества.
+
     Args:
-        last_net: Предыдущие значения сетевых счетчиков
-        last_time: Время последнего измерения (в секундах)
-        
+        prev: Счетчики ядер предыдущего замера, форма (ядра, 10)
+        current: Счетчики ядер текущего замера, форма (ядра, 10)
+
     Returns:
         Кортеж из:
-        - CPU загрузка в процентах
-        - Использование RAM в процентах
-        - Скорость отправки данных (KB/s)
-        - Скорость получения данных (KB/s)
-        - Текущее время измерения (в секундах)
-        
-    Note:
-        Все значения скорости автоматически нормализуются по времени измерения
-    """
-    # Получаем текущие значения метрик
-    cpu_usage = psutil.cpu_percent(interval=None)
-    ram_usage = psutil.virtual_memory().percent
-    current_net = psutil.net_io_counters()
-    
-    # Рассчитываем временной интервал
-    current_time = time.time()
-    time_diff = max(current_time - last_time, 1e-6)  # Защита от нулевого делителя
-    
-    # Вычисляем скорости передачи данных
-    sent_speed = (current_net.bytes_sent - last_net.bytes_sent) / time_diff / 1024
-    recv_speed = (current_net.bytes_recv - last_net.bytes_recv) / time_diff / 1024
-    
-    return cpu_usage, ram_usage, sent_speed, recv_speed, current_time
\ No newline at end of file
+        - Загрузки каждого ядра в процентах
+        - Распределения суммарной нагрузки по видам в процентах
+    """
+    if prev.shape != current.shape:
+        # Ядро ушло в offline или вернулось — разности за этот такт нет
+        return np.zeros(len(current)), CpuSplit(0.0, 0.0, 0.0, 0.0)
+
+    delta = np.maximum(current - prev, 0)
+    total = delta.sum(axis=1) - delta[:, _GUEST] - delta[:, _GUEST_NICE]
+    busy = total - delta[:, _IDLE] - delta[:, _IOWAIT]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = np.where(total > 0, busy / total * 100, 0.0).clip(0.0, 100.0)
+
+    # Распределение считается по сумме разностей всех ядер
+    summed = delta.sum(axis=0)
+    all_total = total.sum()
+    if all_total <= 0:
+        return percent, CpuSplit(0.0, 0.0, 0.0, 0.0)
+
+    scale = 100 / all_total
+    split = CpuSplit(
+        user=float((summed[_USER] + summed[_NICE]) * scale),
+        system=float((summed[_SYSTEM] + summed[_IRQ] + summed[_SOFTIRQ]) * scale),
+        iowait=float(summed[_IOWAIT] * scale),
+        steal=float(summed[_STEAL] * scale),
+    )
+    return percent, split
+
+
+class PsutilBackend:
+    """Источник сырых счетчиков через psutil (работает на любой платформе)"""
+
+    name = "psutil"
+
+    def __init__(self) -> None:
+        # Столбцы CpuTimes, которые есть у psutil на этой платформе
+        fields = psutil.cpu_times()._fields
+        self._columns = [CpuTimes._fields.index(field) for field in fields if field in CpuTimes._fields]
+        self._source = [fields.index(CpuTimes._fields[column]) for column in self._columns]
+
+    def read_cpu(self) -> Tuple[CpuTimes, np.ndarray]:
+        """
+        Читает счетчики времени CPU по ядрам
+
+        Returns:
+            Кортеж из суммарных счетчиков и массива счетчиков ядер (ядра, 10)
+        """
+        raw = np.array(psutil.cpu_times(percpu=True), dtype=np.float64)
+        cores = np.zeros((len(raw), len(CpuTimes._fields)))
+        cores[:, self._columns] = raw[:, self._source]
+        return CpuTimes(*cores.sum(axis=0).tolist()), cores
+
+    def read_memory(self) -> MemoryStats:
+        """Читает показатели памяти"""
+        memory = psutil.virtual_memory()
+        return MemoryStats(memory.total, memory.available, memory.percent)
+
+    def read_net(self) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """
+        Читает сетевые счетчики каждого интерфейса
+
+        Returns:
+            Кортеж из имен интерфейсов и массива счетчиков (интерфейсы, 8)
+        """
+        pernic = psutil.net_io_counters(pernic=True)
+        counters = np.array(list(pernic.values()), dtype=np.int64).reshape(-1, 8)
+        return tuple(pernic), counters
+
+    def read_counters(self) -> SystemCounters:
+        """
+        Читает монотонные счетчики ядра
+
+        Note:
+            Системных страничных ошибок psutil не отдает — они равны нулю
+        """
+        stats = psutil.cpu_stats()
+        disk = psutil.disk_io_counters()
+        read_bytes = disk.read_bytes if disk else 0
+        write_bytes = disk.write_bytes if disk else 0
+        return SystemCounters(stats.ctx_switches, stats.interrupts, 0, 0, read_bytes, write_bytes)
+
+    def close(self) -> None:
+        """Освобождение ресурсов (у psutil их нет)"""
+
+
+class ProcBackend:
+    """
+    Источник сырых счетчиков напрямую из /proc (только Linux)
+
+    Файлы /proc/stat, /proc/meminfo и /proc/net/dev открываются один раз и
+    перечитываются через pread с нулевого смещения в переиспользуемый буфер.
+    Разбираются только нужные поля, результат совпадает с psutil.
+    """
+
+    name = "proc"
+
+    _PATHS = ("/proc/stat", "/proc/meminfo", "/proc/net/dev")
+    # Необязательные файлы: без них соответствующие счетчики равны нулю
+    _OPTIONAL_PATHS = ("/proc/vmstat", "/proc/diskstats")
+
+    def __init__(self) -> None:
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._buf = bytearray(8192)
+        self._fds = {}
+        self._stat = b""        # Последнее содержимое /proc/stat из read_cpu()
+        self._disks: Dict[bytes, bool] = {}
+
+        try:
+            for path in self._PATHS:
+                self._fds[path] = os.open(path, os.O_RDONLY)
+        except OSError:
+            self.close()
+            raise
+
+        for path in self._OPTIONAL_PATHS:
+            try:
+                self._fds[path] = os.open(path, os.O_RDONLY)
+            except OSError as e:
+                logging.info("Файл %s недоступен: %s", path, e)
+
+    def _read(self, path: str) -> bytes:
+        """Перечитывает файл целиком, увеличивая буфер при необходимости"""
+        fd = self._fds[path]
+
+        while True:
+            size = os.preadv(fd, [self._buf], 0)
+            if size < len(self._buf):
+                return bytes(memoryview(self._buf)[:size])
+            self._buf = bytearray(len(self._buf) * 2)
+
+    def read_cpu(self) -> Tuple[CpuTimes, np.ndarray]:
+        """
+        Читает строки «cpu» и «cpuN» из /proc/stat
+
+        Returns:
+            Кортеж из суммарных счетчиков и массива счетчиков ядер (ядра, 10)
+        """
+        data = self._stat = self._read("/proc/stat")
+        ticks = self._clock_ticks
+
+        # Строки cpuN идут сразу после суммарной строки cpu одним блоком
+        first_end = data.index(b"\n")
+        block_end = first_end
+        while data.startswith(b"cpu", block_end + 1):
+            block_end = data.index(b"\n", block_end + 1)
+
+        # Старые ядра отдают меньше полей — недостающие равны нулю
+        fields = data[:first_end].split()[1:11]
+        values = [int(value) / ticks for value in fields]
+        values.extend([0.0] * (10 - len(values)))
+
+        tokens = data[first_end + 1:block_end].split()
+        width = len(fields) + 1
+        cores = np.zeros((len(tokens) // width, 10))
+        if tokens:
+            raw = np.array(tokens).reshape(-1, width)[:, 1:width]
+            cores[:, :width - 1] = raw.astype(np.int64) / ticks
+
+        return CpuTimes(*values), cores
+
+    def read_memory(self) -> MemoryStats:
+        """Читает MemTotal и MemAvailable из /proc/meminfo"""
+        data = self._read("/proc/meminfo")
+        fields = {}
+
+        for line in data.splitlines():
+            key, _, rest = line.partition(b":")
+            if key in (b"MemTotal", b"MemAvailable", b"MemFree", b"Buffers", b"Cached"):
+                fields[key] = int(rest.split()[0]) * 1024
+                if len(fields) == 5:
+                    break
+
+        total = fields[b"MemTotal"]
+        # До ядра 3.14 MemAvailable нет — оцениваем как psutil в этом случае
+        available = fields.get(b"MemAvailable")
+        if available is None:
+            available = fields[b"MemFree"] + fields[b"Buffers"] + fields[b"Cached"]
+
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+        return MemoryStats(total, available, percent)
+
+    def read_net(self) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """
+        Читает счетчики каждого интерфейса из /proc/net/dev
+
+        Returns:
+            Кортеж из имен интерфейсов и массива счетчиков (интерфейсы, 8)
+        """
+        data = self._read("/proc/net/dev")
+        names = []
+        rests = []
+
+        # Первые две строки — заголовок таблицы
+        for line in data.splitlines()[2:]:
+            name, _, rest = line.partition(b":")
+            names.append(name.strip().decode())
+            rests.append(rest)
+
+        if not names:
+            return (), np.zeros((0, 8), dtype=np.int64)
+
+        raw = np.array(b" ".join(rests).split()).reshape(len(names), -1)
+        return tuple(names), raw[:, _PROC_NET_COLUMNS].astype(np.int64)
+
+    def _is_disk(self, name: bytes) -> bool:
+        """Проверяет, что устройство — целый диск, а не раздел (как в psutil)"""
+        decision = self._disks.get(name)
+        if decision is None:
+            decision = os.path.exists(f"/sys/block/{name.decode().replace('/', '!')}")
+            self._disks[name] = decision
+        return decision
+
+    def read_counters(self) -> SystemCounters:
+        """
+        Читает монотонные счетчики ядра
+
+        Переключения контекста и прерывания берутся из /proc/stat, уже
+        прочитанного в read_cpu() этого такта, поэтому метод вызывается
+        после read_cpu().
+        """
+        stat = self._stat or self._read("/proc/stat")
+        ctx_switches = interrupts = 0
+        for line in stat.splitlines():
+            if line.startswith(b"ctxt "):
+                ctx_switches = int(line.split()[1])
+            elif line.startswith(b"intr "):
+                interrupts = int(line.split(None, 2)[1])
+
+        page_faults = major_faults = 0
+        if "/proc/vmstat" in self._fds:
+            for line in self._read("/proc/vmstat").splitlines():
+                if line.startswith(b"pgfault "):
+                    page_faults = int(line.split()[1])
+                elif line.startswith(b"pgmajfault "):
+                    major_faults = int(line.split()[1])
+
+        sectors_read = sectors_written = 0
+        if "/proc/diskstats" in self._fds:
+            for line in self._read("/proc/diskstats").splitlines():
+                fields = line.split()
+                if self._is_disk(fields[2]):
+                    sectors_read += int(fields[5])
+                    sectors_written += int(fields[9])
+
+        return SystemCounters(
+            ctx_switches, interrupts, page_faults, major_faults,
+            sectors_read * DISK_SECTOR_SIZE, sectors_written * DISK_SECTOR_SIZE,
+        )
+
+    def close(self) -> None:
+        """Закрывает открытые файлы /proc"""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+
+def create_backend(name: str = METRICS_BACKEND):
+    """
+    Создает источник сырых счетчиков
+
+    Args:
+        name: "proc", "psutil" или "auto" (proc на Linux, иначе psutil)
+
+    Returns:
+        ProcBackend или PsutilBackend
+    """
+    if name == "psutil" or (name == "auto" and not sys.platform.startswith("linux")):
+        return PsutilBackend()
+
+    try:
+        return ProcBackend()
+    except OSError as e:
+        logging.warning("Чтение /proc недоступно, используется psutil: %s", e)
+        return PsutilBackend()
+
+
+class MetricsSampler:
+    """
+    Источник замеров системных метрик
+
+    Каждый вызов sample() читает счетчики один раз и возвращает
+    неизменяемый MetricsSnapshot, скорости в котором посчитаны
+    относительно предыдущего замера. Все монотонные счетчики (сеть по
+    интерфейсам, счетчики ядра) пересчитываются в скорости общим RateEngine.
+    """
+
+    def __init__(self, backend=None, nic_filter: Optional[InterfaceFilter] = None) -> None:
+        """
+        Args:
+            backend: Источник сырых счетчиков (по умолчанию create_backend())
+            nic_filter: Фильтр интерфейсов для суммарной скорости сети
+        """
+        self.backend = backend or create_backend()
+        self.nic_filter = nic_filter or InterfaceFilter()
+
+        self.rates = RateEngine()
+        self._system_slots = self.rates.register(
+            "system", len(SystemCounters._fields), KERNEL_COUNTER_BITS
+        )
+        self._nic_names: Tuple[str, ...] = ()
+        self._nic_slots = np.zeros(0, dtype=np.intp)
+
+        # Начальный замер, от которого считаются разности первого такта
+        self._last = self._read(None)
+
+    def _sync_interfaces(self, names: Tuple[str, ...]) -> np.ndarray:
+        """
+        Регистрирует появившиеся интерфейсы и освобождает исчезнувшие
+
+        Returns:
+            Индексы слотов всех счетчиков интерфейсов, выровненные по names
+        """
+        if names == self._nic_names:
+            return self._nic_slots
+
+        width = len(NetworkStats._fields)
+        for name in set(self._nic_names) - set(names):
+            self.rates.unregister(f"nic:{name}")
+        for name in names:
+            if f"nic:{name}" not in self.rates:
+                self.rates.register(f"nic:{name}", width, KERNEL_COUNTER_BITS)
+
+        self._nic_names = names
+        self._nic_slots = np.concatenate(
+            [self.rates.slots(f"nic:{name}") for name in names] or [np.zeros(0, dtype=np.intp)]
+        )
+        return self._nic_slots
+
+    def _read(self, prev: Optional[MetricsSnapshot]) -> MetricsSnapshot:
+        """Читает счетчики и рассчитывает производные относительно prev"""
+        cpu_times, core_times = self.backend.read_cpu()
+        memory = self.backend.read_memory()
+        nic_names, nic_counters = self.backend.read_net()
+        counters = self.backend.read_counters()
+        now = time.monotonic()
+
+        # Все монотонные счетчики пересчитываются в скорости одним проходом
+        nic_slots = self._sync_interfaces(nic_names)
+        self.rates.update(nic_slots, nic_counters.ravel())
+        self.rates.update(self._system_slots, counters)
+        rates = self.rates.tick(now)
+
+        nic_rates = rates[nic_slots].reshape(nic_counters.shape)
+        counter_rates = SystemCounters(*rates[self._system_slots].tolist())
+
+        nic_selected = self.nic_filter.mask(nic_names)
+        net = NetworkStats(*nic_counters[nic_selected].sum(axis=0).tolist())
+        # Суммарная скорость — сумма скоростей интерфейсов, поэтому появление
+        # или исчезновение интерфейса не дает скачка в общем графике
+        selected_rates = nic_rates[nic_selected]
+
+        if prev is None:
+            cpu_percent = 0.0
+            core_percent, cpu_split = np.zeros(len(core_times)), CpuSplit(0.0, 0.0, 0.0, 0.0)
+        else:
+            cpu_percent = cpu_percent_between(prev.cpu_times, cpu_times)
+            core_percent, cpu_split = core_usage_between(prev.core_times, core_times)
+
+        for array in (core_times, core_percent, nic_counters, nic_rates):
+            array.flags.writeable = False
+
+        return MetricsSnapshot(
+            timestamp=now,
+            cpu_times=cpu_times,
+            core_times=core_times,
+            memory=memory,
+            net=net,
+            nic_names=nic_names,
+            nic_counters=nic_counters,
+            nic_rates=nic_rates,
+            nic_selected=nic_selected,
+            counters=counters,
+            counter_rates=counter_rates,
+            cpu_percent=cpu_percent,
+            core_percent=core_percent,
+            cpu_split=cpu_split,
+            ram_percent=memory.percent,
+            sent_speed=float(selected_rates[:, _BYTES_SENT].sum()) / 1024,
+            recv_speed=float(selected_rates[:, _BYTES_RECV].sum()) / 1024,
+        )
+
+    def sample(self) -> MetricsSnapshot:
+        """
+        Снимает очередной замер
+
+        Returns:
+            Замер, скорости в котором рассчитаны от предыдущего замера
+        """
+        self._last = self._read(self._last)
+        return self._last
+
+    def close(self) -> None:
+        """Освобождает ресурсы источника счетчиков"""
+        self.backend.close()
+
+
+class AdaptiveInterval:
+    """
+    Адаптивный период опроса метрик
+
+    Пока соседние замеры отличаются меньше порогов, период растет в backoff
+    раз до ceiling_sec. Как только изменение любой метрики превышает порог,
+    период сразу падает до floor_sec, чтобы не пропустить всплеск.
+    """
+
+    def __init__(
+        self,
+        floor_sec: float,
+        ceiling_sec: float,
+        backoff: float = METRICS_ADAPTIVE_BACKOFF,
+        thresholds: Dict[str, float] = METRICS_ADAPTIVE_THRESHOLDS,
+    ) -> None:
+        """
+        Args:
+            floor_sec: Наименьший период опроса (в секундах)
+            ceiling_sec: Наибольший период опроса (в секундах)
+            backoff: Множитель роста периода на стабильном замере
+            thresholds: Пороги изменения cpu_percent, ram_percent и net_speed
+        """
+        self.floor_sec = floor_sec
+        self.ceiling_sec = ceiling_sec
+        self.backoff = backoff
+        self.thresholds = thresholds
+        self.interval_sec = floor_sec
+
+    def is_active(self, prev: MetricsSnapshot, current: MetricsSnapshot) -> bool:
+        """Проверяет, превысило ли изменение хотя бы одной метрики порог"""
+        net_prev = prev.sent_speed + prev.recv_speed
+        net_current = current.sent_speed + current.recv_speed
+        return (
+            abs(current.cpu_percent - prev.cpu_percent) > self.thresholds["cpu_percent"]
+            or abs(current.ram_percent - prev.ram_percent) > self.thresholds["ram_percent"]
+            or abs(net_current - net_prev) > self.thresholds["net_speed"]
+        )
+
+    def update(self, prev: Optional[MetricsSnapshot], current: MetricsSnapshot) -> float:
+        """
+        Пересчитывает период по двум последним замерам
+
+        Returns:
+            Период до следующего замера (в секундах)
+        """
+        if prev is None or self.is_active(prev, current):
+            self.interval_sec = self.floor_sec
+        else:
+            self.interval_sec = min(self.interval_sec * self.backoff, self.ceiling_sec)
+        return self.interval_sec
+
+
+class SamplerThread(threading.Thread):
+    """
+    Фоновый поток сбора метрик
+
+    Все вызовы psutil выполняются в этом потоке. Готовый замер
+    публикуется в слот «последнего значения» под замком, основной цикл Tk
+    только читает его через latest() и никогда не ждет системных вызовов.
+    """
+
+    def __init__(
+        self,
+        interval_sec: float,
+        sinks: Iterable = (),
+        adaptive: Optional[AdaptiveInterval] = None,
+    ) -> None:
+        """
+        Args:
+            interval_sec: Период опроса метрик (в секундах)
+            sinks: Получатели замеров с методом append(snapshot), например
+                history.MetricsHistory и stats.RollingStats
+            adaptive: Адаптивный период; если задан, interval_sec не используется
+        """
+        super().__init__(name="metrics-sampler", daemon=True)
+        self.adaptive = adaptive
+        self.interval_sec = adaptive.interval_sec if adaptive else interval_sec
+        self.sinks = tuple(sinks)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._latest: Optional[MetricsSnapshot] = None
+
+    def run(self) -> None:
+        """Цикл опроса: снимает метрики и публикует их до вызова stop()"""
+        sampler = MetricsSampler()
+        prev: Optional[MetricsSnapshot] = None
+
+        # Замеры идут по абсолютным дедлайнам, поэтому время самого замера
+        # не сдвигает период
+        period = self.interval_sec
+        epoch = time.monotonic()
+        deadline = epoch + period
+
+        try:
+            while not self._stop_event.wait(max(0.0, deadline - time.monotonic())):
+                snapshot = sampler.sample()
+                for sink in self.sinks:
+                    sink.append(snapshot)
+
+                with self._lock:
+                    self._latest = snapshot
+
+                if self.adaptive is not None:
+                    self.interval_sec = self.adaptive.update(prev, snapshot)
+                    if self.interval_sec != period:
+                        epoch, period = deadline, self.interval_sec
+                prev = snapshot
+
+                deadline = next_deadline(epoch, period, time.monotonic())
+        finally:
+            sampler.close()
+
+    def latest(self) -> Optional[MetricsSnapshot]:
+        """
+        Возвращает последний опубликованный замер
+
+        Returns:
+            Замер или None, если поток еще ничего не опубликовал
+        """
+        with self._lock:
+            return self._latest
+
+    def stop(self) -> None:
+        """Останавливает поток опроса"""
+        self._stop_event.set()
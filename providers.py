@@ -0,0 +1,446 @@
+"""
+Модуль источников погоды: Open-Meteo, MET Norway и хеджированный выбор между ними
+"""
+
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+from config import (
+    API_URL,
+    MET_NORWAY_URL,
+    MET_NORWAY_USER_AGENT,
+    WEATHER_PROVIDERS,
+    WEATHER_HEDGE,
+    WEATHER_MODEL_INTERVAL_SEC,
+    WEATHER_MIN_REFETCH_SEC,
+    WEATHER_FORECAST_STEP,
+    WEATHER_FORECAST_HOURS,
+    WEATHER_FORECAST_REFRESH_SEC,
+)
+from hedge import Hedge
+from http_client import client
+
+Coords = Tuple[float, float]
+
+
+class WeatherReport(NamedTuple):
+    """Текущая погода"""
+    weathercode: int
+    temperature: float      # Температура (°C)
+    windspeed: float        # Скорость ветра
+    fetched_at: float       # Время получения по системным часам (в секундах)
+    observed_at: float      # Время наблюдения по данным сервера (UNIX-время)
+    expires_at: float       # Время, после которого данные стоит запросить заново
+
+
+class WeatherForecast(NamedTuple):
+    """Прогноз на ближайшие часы: ряды значений на общей сетке времени"""
+    times: np.ndarray           # Моменты прогноза (UNIX-время)
+    temperature: np.ndarray     # Температура (°C)
+    windspeed: np.ndarray       # Скорость ветра
+    weathercode: np.ndarray     # Код погоды
+    fetched_at: float           # Время получения по системным часам (в секундах)
+    expires_at: float           # Время, после которого прогноз стоит обновить
+
+
+class WeatherProvider(ABC):
+    """
+    Базовый класс источника погоды
+
+    Источник возвращает отчеты и прогнозы в единицах Open-Meteo (°C, км/ч,
+    коды погоды WMO), поэтому источники взаимозаменяемы. Запросы —
+    корутины для цикла asyncio: отмена корутины прекращает и оставшиеся
+    запросы источника.
+    """
+
+    name = ""
+    # Точки доступа HttpClient, через которые ходит источник
+    endpoints: Tuple[str, ...] = ()
+
+    @abstractmethod
+    async def fetch_current(self, coords: Sequence[Coords]) -> List[WeatherReport]:
+        """
+        Запрашивает текущую погоду
+
+        Args:
+            coords: Пары (широта, долгота)
+
+        Returns:
+            Текущая погода в порядке coords
+
+        Raises:
+            requests.RequestException: При ошибке сети или HTTP
+            ValueError: При неожиданном формате ответа
+        """
+
+    @abstractmethod
+    async def fetch_forecast(
+        self, coords: Sequence[Coords], step: str = WEATHER_FORECAST_STEP
+    ) -> List[WeatherForecast]:
+        """
+        Запрашивает прогноз температуры, ветра и кода погоды
+
+        Args:
+            coords: Пары (широта, долгота)
+            step: Шаг ряда: "hourly" или "minutely_15"
+
+        Returns:
+            Прогнозы на WEATHER_FORECAST_HOURS часов вперед в порядке coords
+
+        Raises:
+            requests.RequestException: При ошибке сети или HTTP
+            ValueError: Если в ответе нет рядов прогноза
+        """
+
+    def log_stats(self) -> None:
+        """Записывает в лог статистику источника"""
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """
+    Open-Meteo: все точки запрашиваются одним запросом
+
+    API принимает списки широт и долгот через запятую и в этом случае
+    возвращает массив ответов в том же порядке.
+    """
+
+    name = "open-meteo"
+    endpoints = ("weather",)
+
+    def __init__(self, url: str = API_URL) -> None:
+        """
+        Args:
+            url: Адрес API прогноза
+        """
+        self.url = url
+
+    async def _request(self, coords: Sequence[Coords], params: dict) -> Tuple[List[dict], requests.Response]:
+        """
+        Выполняет один запрос к API погоды сразу для всех координат
+
+        Returns:
+            Кортеж из ответов по каждой точке и HTTP-ответа
+        """
+        response = await client.aget(
+            "weather",
+            self.url,
+            params={
+                "latitude": ",".join(str(lat) for lat, _ in coords),
+                "longitude": ",".join(str(lon) for _, lon in coords),
+                **params,
+            }
+        )
+        response.raise_for_status()
+
+        payload = response.json()
+        payloads = payload if isinstance(payload, list) else [payload]
+        if len(payloads) != len(coords):
+            raise ValueError(f"Ожидалось ответов: {len(coords)}, получено: {len(payloads)}")
+        return payloads, response
+
+    async def fetch_current(self, coords: Sequence[Coords]) -> List[WeatherReport]:
+        payloads, response = await self._request(coords, {
+            "current_weather": True,
+            "timezone": "Europe/Helsinki"
+        })
+        now = time.time()
+        # Заголовки кэширования сервера, если они есть, имеют приоритет, но
+        # и при no-cache запрос повторяется не чаще WEATHER_MIN_REFETCH_SEC
+        server_expires = _expires_at(response.headers, now)
+
+        reports = []
+        for payload in payloads:
+            data = payload.get("current_weather", {})
+            observed_at = _observation_time(data.get("time"), payload.get("utc_offset_seconds", 0), now)
+            interval = data.get("interval") or WEATHER_MODEL_INTERVAL_SEC
+
+            # Новые данные появятся через интервал модели после наблюдения; если
+            # этот момент уже прошел, повторяем запрос не чаще WEATHER_MIN_REFETCH_SEC
+            expires_at = max(observed_at + interval, now + WEATHER_MIN_REFETCH_SEC)
+            if server_expires is not None:
+                expires_at = max(server_expires, now + WEATHER_MIN_REFETCH_SEC)
+
+            reports.append(WeatherReport(
+                weathercode=data.get("weathercode", 0),
+                temperature=data.get("temperature", "?"),
+                windspeed=data.get("windspeed", "?"),
+                fetched_at=now,
+                observed_at=observed_at,
+                expires_at=expires_at,
+            ))
+        return reports
+
+    async def fetch_forecast(
+        self, coords: Sequence[Coords], step: str = WEATHER_FORECAST_STEP
+    ) -> List[WeatherForecast]:
+        payloads, _ = await self._request(coords, {
+            step: "temperature_2m,windspeed_10m,weathercode",
+            "forecast_hours": WEATHER_FORECAST_HOURS,
+            "past_hours": 1,
+            "timeformat": "unixtime",
+            "timezone": "Europe/Helsinki"
+        })
+        now = time.time()
+
+        forecasts = []
+        for payload in payloads:
+            series = payload.get(step)
+            if not series or not series.get("time"):
+                raise ValueError("В ответе нет рядов прогноза")
+
+            forecasts.append(WeatherForecast(
+                times=np.asarray(series["time"], dtype=np.float64),
+                temperature=np.asarray(series["temperature_2m"], dtype=np.float64),
+                windspeed=np.asarray(series["windspeed_10m"], dtype=np.float64),
+                weathercode=np.asarray(series["weathercode"], dtype=np.float64),
+                fetched_at=now,
+                expires_at=now + WEATHER_FORECAST_REFRESH_SEC,
+            ))
+        return forecasts
+
+
+# Коды погоды WMO для значков MET Norway (без суффиксов _day, _night, _polartwilight)
+MET_WEATHERCODES = {
+    "clearsky": 0, "fair": 1, "partlycloudy": 2, "cloudy": 3, "fog": 45,
+    "lightrain": 61, "rain": 63, "heavyrain": 65,
+    "lightrainshowers": 80, "rainshowers": 81, "heavyrainshowers": 82,
+    "lightsleet": 66, "sleet": 67, "heavysleet": 67,
+    "lightsleetshowers": 66, "sleetshowers": 67, "heavysleetshowers": 67,
+    "lightsnow": 71, "snow": 73, "heavysnow": 75,
+    "lightsnowshowers": 85, "snowshowers": 86, "heavysnowshowers": 86,
+}
+
+
+class MetNorwayProvider(WeatherProvider):
+    """
+    MET Norway (api.met.no, Locationforecast 2.0 compact)
+
+    API отдает одну точку на запрос, поэтому точки запрашиваются по очереди
+    через общий пул соединений. Скорость ветра переводится из м/с в км/ч,
+    значки погоды — в коды WMO, чтобы отчеты совпадали с Open-Meteo.
+    """
+
+    name = "met-norway"
+    endpoints = ("met-norway",)
+
+    def __init__(self, url: str = MET_NORWAY_URL) -> None:
+        """
+        Args:
+            url: Адрес API Locationforecast
+        """
+        self.url = url
+
+    async def _request(self, coords: Sequence[Coords]) -> List[Tuple[List[dict], Optional[float]]]:
+        """
+        Запрашивает ряды прогноза для каждой точки
+
+        Returns:
+            Для каждой точки: ряд timeseries и время Expires из заголовков (если есть)
+        """
+        results = []
+        for lat, lon in coords:
+            # API требует не больше четырех знаков после запятой
+            response = await client.aget(
+                "met-norway",
+                self.url,
+                params={"lat": round(lat, 4), "lon": round(lon, 4)},
+                headers={"User-Agent": MET_NORWAY_USER_AGENT},
+            )
+            response.raise_for_status()
+
+            timeseries = response.json().get("properties", {}).get("timeseries")
+            if not timeseries:
+                raise ValueError("В ответе нет рядов прогноза")
+            results.append((timeseries, _expires_at(response.headers, time.time())))
+        return results
+
+    @staticmethod
+    def _point(entry: dict) -> Tuple[float, float, float, float]:
+        """Время, температура, ветер (км/ч) и код погоды одной точки ряда"""
+        details = entry.get("data", {}).get("instant", {}).get("details", {})
+        wind = details.get("wind_speed")
+        return (
+            datetime.fromisoformat(entry["time"].replace("Z", "+00:00")).timestamp(),
+            details.get("air_temperature", np.nan),
+            np.nan if wind is None else round(wind * 3.6, 1),
+            _met_weathercode(entry.get("data", {})),
+        )
+
+    async def fetch_current(self, coords: Sequence[Coords]) -> List[WeatherReport]:
+        now = time.time()
+        reports = []
+        for timeseries, server_expires in await self._request(coords):
+            # Последняя точка ряда, которая уже наступила
+            points = [self._point(entry) for entry in timeseries[:3]]
+            observed_at, temperature, windspeed, code = points[0]
+            for point in points[1:]:
+                if point[0] <= now:
+                    observed_at, temperature, windspeed, code = point
+
+            expires_at = now + WEATHER_MODEL_INTERVAL_SEC
+            if server_expires is not None:
+                expires_at = max(server_expires, now + WEATHER_MIN_REFETCH_SEC)
+
+            # Пропуски показываются так же, как у Open-Meteo
+            reports.append(WeatherReport(
+                weathercode=0 if np.isnan(code) else int(code),
+                temperature="?" if np.isnan(temperature) else temperature,
+                windspeed="?" if np.isnan(windspeed) else windspeed,
+                fetched_at=now,
+                observed_at=observed_at,
+                expires_at=expires_at,
+            ))
+        return reports
+
+    async def fetch_forecast(
+        self, coords: Sequence[Coords], step: str = WEATHER_FORECAST_STEP
+    ) -> List[WeatherForecast]:
+        # Шаг ряда MET Norway фиксирован (1 ч, дальше 6 ч), step не используется
+        now = time.time()
+        horizon = now + WEATHER_FORECAST_HOURS * 3600
+
+        forecasts = []
+        for timeseries, _ in await self._request(coords):
+            points = np.array(
+                [self._point(entry) for entry in timeseries], dtype=np.float64
+            )
+            points = points[points[:, 0] <= horizon]
+
+            forecasts.append(WeatherForecast(
+                times=points[:, 0],
+                temperature=points[:, 1],
+                windspeed=points[:, 2],
+                weathercode=points[:, 3],
+                fetched_at=now,
+                expires_at=now + WEATHER_FORECAST_REFRESH_SEC,
+            ))
+        return forecasts
+
+
+class HedgedProvider(WeatherProvider):
+    """
+    Хеджированный запрос к нескольким источникам
+
+    Сначала запрашивается основной источник; резервный запускается, только
+    если основной не ответил за p95 своих недавних задержек или ответил
+    ошибкой. Побеждает первый успешный ответ. Задержки текущей погоды и
+    прогноза оцениваются отдельно: ответы различаются по размеру на порядок.
+    """
+
+    def __init__(self, providers: Sequence[WeatherProvider]) -> None:
+        """
+        Args:
+            providers: Источники в порядке приоритета (первый — основной)
+        """
+        self.providers = tuple(providers)
+        self.name = "+".join(provider.name for provider in self.providers)
+        self.endpoints = tuple(
+            endpoint for provider in self.providers for endpoint in provider.endpoints
+        )
+        names = [provider.name for provider in self.providers]
+        self.current = Hedge(names)
+        self.forecast = Hedge(names)
+
+    async def fetch_current(self, coords: Sequence[Coords]) -> List[WeatherReport]:
+        return await self.current.call([
+            lambda provider=provider: provider.fetch_current(coords)
+            for provider in self.providers
+        ])
+
+    async def fetch_forecast(
+        self, coords: Sequence[Coords], step: str = WEATHER_FORECAST_STEP
+    ) -> List[WeatherForecast]:
+        return await self.forecast.call([
+            lambda provider=provider: provider.fetch_forecast(coords, step)
+            for provider in self.providers
+        ])
+
+    def log_stats(self) -> None:
+        for kind, hedge in (("текущая погода", self.current), ("прогноз", self.forecast)):
+            stats = hedge.stats()
+            logging.info(
+                "Источники погоды (%s): запросов %d, с резервным %d, победы %s, задержка резерва %.0f мс",
+                kind, stats.calls, stats.hedged, stats.wins, stats.delay * 1000
+            )
+
+
+PROVIDERS = {
+    OpenMeteoProvider.name: OpenMeteoProvider,
+    MetNorwayProvider.name: MetNorwayProvider,
+}
+
+
+def create_provider(names: Sequence[str] = WEATHER_PROVIDERS, hedge: bool = WEATHER_HEDGE) -> WeatherProvider:
+    """
+    Создает источник погоды
+
+    Args:
+        names: Имена источников в порядке приоритета (ключи PROVIDERS)
+        hedge: Запрашивать резервные источники при задержке основного
+
+    Returns:
+        Единственный источник или HedgedProvider над несколькими
+    """
+    providers = []
+    for name in names:
+        if name in PROVIDERS:
+            providers.append(PROVIDERS[name]())
+        else:
+            logging.warning("Неизвестный источник погоды '%s' пропущен", name)
+
+    if not providers:
+        providers.append(OpenMeteoProvider())
+    if len(providers) == 1 or not hedge:
+        return providers[0]
+    return HedgedProvider(providers)
+
+
+def _met_weathercode(data: dict) -> float:
+    """Код погоды WMO по значку ближайшего интервала MET Norway (NaN, если значка нет)"""
+    for period in ("next_1_hours", "next_6_hours", "next_12_hours"):
+        symbol = data.get(period, {}).get("summary", {}).get("symbol_code")
+        if symbol:
+            base = symbol.split("_")[0]
+            if "thunder" in base:
+                return 95
+            return MET_WEATHERCODES.get(base, 0)
+    return np.nan
+
+
+def _observation_time(value: Optional[str], utc_offset: int, default: float) -> float:
+    """Переводит локальное время наблюдения из ответа API в UNIX-время"""
+    if not value:
+        return default
+    try:
+        local = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return default
+    return local.timestamp() - utc_offset
+
+
+def _expires_at(headers: Dict[str, str], now: float) -> Optional[float]:
+    """
+    Время устаревания ответа по заголовкам кэширования
+
+    Returns:
+        now + max-age из Cache-Control, иначе время из Expires, иначе None
+    """
+    cache_control = headers.get("Cache-Control", "")
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return now
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return now + int(match.group(1))
+
+    try:
+        return parsedate_to_datetime(headers["Expires"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,138 @@
+"""
+Модуль пересчета монотонных счетчиков ядра в скорости
+"""
+
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+
+Timestamp = float
+
+
+class RateEngine:
+    """
+    Движок пересчета монотонных счетчиков в скорости (значение в секунду)
+
+    Любой счетчик (байты сети, секторы дисков, переключения контекста,
+    страничные ошибки) регистрируется под именем и получает слот в общих
+    массивах. Коллекторы записывают текущие значения в свои слоты через
+    update(), а tick() одним векторным проходом считает скорости всех
+    счетчиков по монотонным часам.
+
+    Разности считаются по модулю 2**bits, поэтому переполнение 32-битного
+    счетчика дает правильную скорость. Уменьшение значения, которое нельзя
+    объяснить переполнением, считается сбросом (счетчик начат заново с нуля).
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        """
+        Args:
+            capacity: Начальное количество слотов (массивы растут по мере регистрации)
+        """
+        self._names: List[Optional[str]] = [None] * capacity
+        self._slots: Dict[str, np.ndarray] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+        self._current = np.zeros(capacity, dtype=np.uint64)
+        self._prev = np.zeros(capacity, dtype=np.uint64)
+        self._mask = np.zeros(capacity, dtype=np.uint64)   # 2**bits - 1 для каждого слота
+        self._fresh = np.zeros(capacity, dtype=bool)       # Слот еще не прошел ни одного такта
+        self._prev_time: Optional[Timestamp] = None
+
+        self.resets = 0     # Количество обнаруженных сбросов счетчиков
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._slots
+
+    def _grow(self) -> None:
+        """Удваивает емкость массивов, сохраняя состояние слотов"""
+        old = len(self._current)
+        self._names.extend([None] * old)
+        self._free.extend(range(old * 2 - 1, old - 1, -1))
+
+        for attr in ("_current", "_prev", "_mask", "_fresh"):
+            array = getattr(self, attr)
+            setattr(self, attr, np.concatenate([array, np.zeros_like(array)]))
+
+    def register(self, name: str, size: int = 1, bits: int = 64) -> np.ndarray:
+        """
+        Регистрирует счетчик или блок из size счетчиков
+
+        Args:
+            name: Уникальное имя счетчика (или блока, например интерфейса)
+            size: Количество счетчиков в блоке
+            bits: Разрядность счетчика в ядре (32 или 64)
+
+        Returns:
+            Массив индексов слотов, который передается в update()
+        """
+        if name in self._slots:
+            raise ValueError(f"Счетчик '{name}' уже зарегистрирован")
+
+        while len(self._free) < size:
+            self._grow()
+
+        slots = np.array([self._free.pop() for _ in range(size)], dtype=np.intp)
+        for slot in slots:
+            self._names[slot] = name
+
+        self._mask[slots] = np.uint64((1 << bits) - 1)
+        self._fresh[slots] = True
+        self._slots[name] = slots
+        return slots
+
+    def unregister(self, name: str) -> None:
+        """Освобождает слоты счетчика; остальные счетчики не затрагиваются"""
+        slots = self._slots.pop(name)
+        for slot in slots:
+            self._names[slot] = None
+        self._free.extend(slots.tolist())
+
+    def slots(self, name: str) -> np.ndarray:
+        """Индексы слотов зарегистрированного счетчика"""
+        return self._slots[name]
+
+    def update(self, slots: np.ndarray, values) -> None:
+        """
+        Записывает текущие значения счетчиков
+
+        Args:
+            slots: Индексы слотов (из register() или их объединение)
+            values: Значения в том же порядке
+        """
+        self._current[slots] = values
+
+    def tick(self, timestamp: Timestamp) -> np.ndarray:
+        """
+        Рассчитывает скорости всех счетчиков с прошлого такта
+
+        Args:
+            timestamp: Время замера по монотонным часам (в секундах)
+
+        Returns:
+            Скорости в секунду, индексируемые слотами; у новых счетчиков 0
+        """
+        current = self._current
+        delta = (current - self._prev) & self._mask
+
+        # Уменьшение больше половины диапазона — это сброс, а не переполнение
+        reset = (current < self._prev) & (delta > (self._mask >> np.uint64(1)))
+        if reset.any():
+            self.resets += int(reset.sum())
+            logging.debug("Обнаружен сброс счетчиков: %s", [self._names[i] for i in np.flatnonzero(reset)])
+            delta = np.where(reset, current, delta)
+
+        delta[self._fresh] = 0
+        self._fresh[:] = False
+        self._prev = current.copy()
+
+        if self._prev_time is None:
+            time_diff = 0.0
+        else:
+            time_diff = timestamp - self._prev_time
+        self._prev_time = timestamp
+
+        if time_diff <= 0:
+            return np.zeros(len(current))
+        return delta.astype(np.float64) / time_diff
+
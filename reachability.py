@@ -0,0 +1,185 @@
+"""
+Модуль отслеживания доступности сети
+"""
+
+import asyncio
+import errno
+import logging
+import socket
+import sys
+import threading
+from typing import Callable, List, Optional
+
+from config import REACHABILITY_POLL_SEC, REACHABILITY_PROBE_ADDRS, REACHABILITY_SETTLE_SEC
+
+
+# Группы рассылки netlink: изменения интерфейсов, адресов и маршрутов
+_RTMGRP_LINK = 0x1
+_RTMGRP_IPV4_IFADDR = 0x10
+_RTMGRP_IPV4_ROUTE = 0x40
+_RTMGRP_IPV6_IFADDR = 0x100
+_RTMGRP_IPV6_ROUTE = 0x400
+_RTMGRP_ALL = (
+    _RTMGRP_LINK | _RTMGRP_IPV4_IFADDR | _RTMGRP_IPV4_ROUTE
+    | _RTMGRP_IPV6_IFADDR | _RTMGRP_IPV6_ROUTE
+)
+
+
+def has_route() -> bool:
+    """
+    Есть ли маршрут во внешнюю сеть
+
+    connect() UDP-сокета не отправляет пакетов: ядро только выбирает
+    маршрут и сразу возвращает ENETUNREACH, если его нет. Проверка
+    стоит нескольких системных вызовов и работает на всех платформах.
+
+    Returns:
+        True, если маршрут есть хотя бы для одного из REACHABILITY_PROBE_ADDRS
+    """
+    for family, addr in REACHABILITY_PROBE_ADDRS:
+        try:
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.connect(addr)
+            return True
+        except OSError:
+            continue
+    return False
+
+
+class ReachabilityMonitor:
+    """
+    Отслеживание появления и пропадания сети в цикле asyncio
+
+    На Linux цикл следит за сокетом netlink и просыпается только при
+    изменении интерфейсов, адресов или маршрутов — отдельный поток не
+    нужен. На других системах (или если netlink недоступен) маршрут
+    проверяется корутиной раз в REACHABILITY_POLL_SEC секунд. Подписчики
+    вызываются в потоке цикла при каждой смене состояния.
+    """
+
+    def __init__(self) -> None:
+        self._online = threading.Event()
+        if has_route():
+            self._online.set()
+        self._listeners: List[Callable[[bool], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sock: Optional[socket.socket] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._settle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def online(self) -> bool:
+        """Есть ли сейчас маршрут во внешнюю сеть"""
+        return self._online.is_set()
+
+    def subscribe(self, listener: Callable[[bool], None]) -> None:
+        """
+        Добавляет подписчика на смену состояния сети
+
+        Args:
+            listener: Функция, принимающая новое состояние (вызывается в потоке цикла asyncio)
+        """
+        self._listeners.append(listener)
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Начинает отслеживание в цикле asyncio (можно вызывать из любого потока)
+
+        Args:
+            loop: Работающий цикл asyncio
+        """
+        self._loop = loop
+        loop.call_soon_threadsafe(self._start)
+
+    def stop(self) -> None:
+        """Прекращает отслеживание"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._close)
+
+    def _start(self) -> None:
+        """Подписка на netlink или запуск опроса (поток цикла)"""
+        self._sock = self._open_netlink()
+        if self._sock is not None:
+            self._loop.add_reader(self._sock.fileno(), self._on_event)
+        else:
+            self._poller = self._loop.create_task(self._poll())
+
+    def _close(self) -> None:
+        """Снимает подписки и закрывает сокет (поток цикла)"""
+        if self._sock is not None:
+            self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+        if self._poller is not None:
+            self._poller.cancel()
+        if self._settle is not None:
+            self._settle.cancel()
+
+    async def _poll(self) -> None:
+        """Периодическая проверка маршрута без netlink"""
+        while True:
+            await asyncio.sleep(REACHABILITY_POLL_SEC)
+            self._check()
+
+    def _on_event(self) -> None:
+        """Обработка событий netlink (поток цикла)"""
+        self._drain(self._sock)
+
+        # События приходят пачками (интерфейс, адрес, маршрут):
+        # состояние проверяется один раз, когда они улягутся
+        if self._settle is None:
+            self._settle = self._loop.call_later(REACHABILITY_SETTLE_SEC, self._settled)
+
+    def _settled(self) -> None:
+        """Проверка после окончания пачки событий"""
+        self._settle = None
+        self._check()
+
+    @staticmethod
+    def _open_netlink() -> Optional[socket.socket]:
+        """Открывает сокет netlink с подпиской на события сети (только Linux)"""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        except OSError as e:
+            logging.info("Netlink недоступен, доступность сети проверяется опросом: %s", e)
+            return None
+
+        try:
+            sock.bind((0, _RTMGRP_ALL))
+            sock.setblocking(False)
+        except OSError as e:
+            sock.close()
+            logging.info("Netlink недоступен, доступность сети проверяется опросом: %s", e)
+            return None
+        return sock
+
+    @staticmethod
+    def _drain(sock: socket.socket) -> None:
+        """Вычитывает накопившиеся события netlink (их содержимое не важно)"""
+        while True:
+            try:
+                sock.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                # Переполнение буфера сокета: события потеряны, но проверка все равно будет
+                if e.errno != errno.ENOBUFS:
+                    raise
+
+    def _check(self) -> None:
+        """Проверяет маршрут и уведомляет подписчиков о смене состояния"""
+        online = has_route()
+        if online == self._online.is_set():
+            return
+
+        if online:
+            self._online.set()
+            logging.info("Сеть снова доступна")
+        else:
+            self._online.clear()
+            logging.warning("Сеть недоступна, сетевые запросы приостановлены")
+
+        for listener in self._listeners:
+            listener(online)
@@ -0,0 +1,171 @@
+"""
+Модуль планировщика периодических задач на монотонных дедлайнах
+"""
+
+import logging
+import math
+import time
+import tkinter as tk
+from typing import Callable, Dict, NamedTuple, Optional
+
+Timestamp = float
+
+
+def next_deadline(epoch: Timestamp, period: float, now: Timestamp) -> Timestamp:
+    """
+    Ближайший дедлайн вида epoch + k * period строго позже now
+
+    Дедлайны привязаны к общей эпохе, а не ко времени окончания работы,
+    поэтому период не «уплывает» на длительность задачи, пропущенные такты
+    не накапливаются, а задачи с кратными периодами просыпаются вместе.
+    """
+    ticks = math.floor((now - epoch) / period) + 1
+    return epoch + ticks * period
+
+
+class TaskStats(NamedTuple):
+    """Статистика выполнения периодической задачи"""
+    runs: int               # Количество запусков
+    period: float           # Заданный период (в секундах)
+    actual_period: float    # Сглаженный фактический период (в секундах)
+    jitter: float           # Сглаженное отклонение фактического периода от заданного (в секундах)
+    overruns: int           # Количество пропущенных тактов
+
+
+class _Task:
+    """Состояние одной периодической задачи"""
+
+    # Вес нового наблюдения в сглаженных периоде и джиттере
+    SMOOTHING = 0.2
+
+    def __init__(self, name: str, period: float, callback: Callable[[], None], deadline: Timestamp) -> None:
+        self.name = name
+        self.period = period
+        self.callback = callback
+        self.deadline = deadline
+
+        self.runs = 0
+        self.overruns = 0
+        self.last_run: Optional[Timestamp] = None
+        self.actual_period = period
+        self.jitter = 0.0
+
+    def record(self, now: Timestamp) -> None:
+        """Учитывает запуск задачи в статистике"""
+        if self.last_run is not None:
+            observed = now - self.last_run
+            self.actual_period += self.SMOOTHING * (observed - self.actual_period)
+            self.jitter += self.SMOOTHING * (abs(observed - self.period) - self.jitter)
+        self.last_run = now
+        self.runs += 1
+
+    def stats(self) -> TaskStats:
+        return TaskStats(self.runs, self.period, self.actual_period, self.jitter, self.overruns)
+
+
+class DeadlineScheduler:
+    """
+    Планировщик периодических задач поверх цикла событий Tk
+
+    Все задачи выполняются в основном потоке по абсолютным дедлайнам на
+    монотонных часах. На каждом пробуждении запускаются все задачи, чей
+    дедлайн наступил, после чего ставится один таймер after() на ближайший
+    следующий дедлайн. Если задача не успела к своему следующему такту,
+    пропущенные такты не догоняются, а учитываются как overruns.
+    """
+
+    def __init__(self, app: tk.Misc, clock: Callable[[], Timestamp] = time.monotonic) -> None:
+        """
+        Args:
+            app: Виджет Tk, через after() которого планируются пробуждения
+            clock: Монотонные часы (в секундах)
+        """
+        self._app = app
+        self._clock = clock
+        self._epoch = clock()
+        self._tasks: Dict[str, _Task] = {}
+        self._timer: Optional[str] = None
+
+    def add(self, name: str, period: float, callback: Callable[[], None], run_now: bool = True) -> None:
+        """
+        Добавляет периодическую задачу
+
+        Args:
+            name: Уникальное имя задачи
+            period: Период (в секундах)
+            callback: Функция без аргументов, выполняемая в основном потоке
+            run_now: Выполнить задачу на ближайшем пробуждении, не дожидаясь такта
+        """
+        now = self._clock()
+        deadline = now if run_now else next_deadline(self._epoch, period, now)
+        self._tasks[name] = _Task(name, period, callback, deadline)
+        self._arm()
+
+    def remove(self, name: str) -> None:
+        """Удаляет задачу"""
+        self._tasks.pop(name, None)
+        self._arm()
+
+    def set_period(self, name: str, period: float) -> None:
+        """Меняет период задачи и выравнивает ее следующий дедлайн по новой сетке"""
+        task = self._tasks[name]
+        if period == task.period:
+            return
+
+        task.period = period
+        task.deadline = next_deadline(self._epoch, period, self._clock())
+        self._arm()
+
+    def run_soon(self, name: str) -> None:
+        """Запускает задачу на ближайшем пробуждении вне очереди"""
+        self._tasks[name].deadline = self._clock()
+        self._arm()
+
+    def stats(self) -> Dict[str, TaskStats]:
+        """Статистика всех задач: фактический период, джиттер и пропуски"""
+        return {name: task.stats() for name, task in self._tasks.items()}
+
+    def stop(self) -> None:
+        """Отменяет запланированное пробуждение"""
+        if self._timer is not None:
+            self._app.after_cancel(self._timer)
+            self._timer = None
+        self._tasks.clear()
+
+    def _arm(self) -> None:
+        """Ставит единственный таймер на ближайший дедлайн"""
+        if self._timer is not None:
+            self._app.after_cancel(self._timer)
+            self._timer = None
+
+        if not self._tasks:
+            return
+
+        deadline = min(task.deadline for task in self._tasks.values())
+        delay_ms = max(0, math.ceil((deadline - self._clock()) * 1000))
+        self._timer = self._app.after(delay_ms, self._run_due)
+
+    def _run_due(self) -> None:
+        """Выполняет задачи с наступившим дедлайном и переназначает таймер"""
+        self._timer = None
+        now = self._clock()
+
+        for task in list(self._tasks.values()):
+            if task.deadline > now:
+                continue
+
+            task.record(now)
+            try:
+                task.callback()
+            except Exception:
+                logging.exception("Ошибка в периодической задаче '%s'", task.name)
+
+            # Следующий дедлайн — ближайший такт сетки после окончания работы
+            finished = self._clock()
+            deadline = next_deadline(self._epoch, task.period, finished)
+            missed = math.floor((finished - task.deadline) / task.period)
+            if missed > 0:
+                task.overruns += missed
+            task.deadline = deadline
+
+        self._arm()
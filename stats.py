@@ -0,0 +1,231 @@
+"""
+Модуль скользящей статистики по метрикам
+"""
+
+import math
+import threading
+import numpy as np
+from collections import deque
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from metrics import MetricsSnapshot
+
+Timestamp = float
+
+# Метрики замера, по которым считается статистика по умолчанию
+STATS_FIELDS = ("cpu_percent", "ram_percent", "sent_speed", "recv_speed")
+
+
+class WindowSummary(NamedTuple):
+    """Сводка метрики за окно"""
+    count: int
+    mean: float
+    ewma: float
+    min: float
+    max: float
+    p50: float
+    p95: float
+    p99: float
+
+
+class QuantileSketch:
+    """
+    Эскиз для приближенных квантилей с поддержкой удаления значений
+
+    Значения раскладываются по логарифмическим корзинам с относительной
+    точностью relative_accuracy (как в DDSketch), поэтому добавление и
+    удаление стоят O(1), а память ограничена числом корзин для диапазона
+    [min_value, max_value]. Значения меньше min_value попадают в нулевую
+    корзину и считаются нулем.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-3, max_value: float = 1e12) -> None:
+        """
+        Args:
+            relative_accuracy: Допустимая относительная ошибка квантиля
+            min_value: Наименьшее различимое положительное значение
+            max_value: Наибольшее значение (большие попадают в последнюю корзину)
+        """
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_value = min_value
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        size = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 2
+
+        self._counts = np.zeros(size, dtype=np.int64)   # Корзина 0 — нули
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def _index(self, value: float) -> int:
+        """Номер корзины для значения"""
+        if value < self._min_value:
+            return 0
+        index = math.ceil(math.log(value) / self._log_gamma) - self._offset + 1
+        return min(index, len(self._counts) - 1)
+
+    def add(self, value: float) -> None:
+        """Добавляет значение"""
+        self._counts[self._index(value)] += 1
+        self._total += 1
+
+    def remove(self, value: float) -> None:
+        """Удаляет ранее добавленное значение"""
+        self._counts[self._index(value)] -= 1
+        self._total -= 1
+
+    def quantiles(self, qs: Iterable[float]) -> Tuple[float, ...]:
+        """
+        Возвращает приближенные квантили
+
+        Args:
+            qs: Уровни квантилей в диапазоне [0, 1]
+
+        Returns:
+            Значения квантилей (NaN, если эскиз пуст)
+        """
+        qs = tuple(qs)
+        if not self._total:
+            return tuple(math.nan for _ in qs)
+
+        cumulative = np.cumsum(self._counts)
+        result = []
+        for q in qs:
+            index = int(np.searchsorted(cumulative, q * (self._total - 1), side="right"))
+            if index == 0:
+                result.append(0.0)
+            else:
+                # Середина корзины (gamma**(i-1), gamma**i] в смысле относительной ошибки
+                power = index - 1 + self._offset
+                result.append(2 * self._gamma ** power / (self._gamma + 1))
+        return tuple(result)
+
+
+class RollingWindow:
+    """
+    Скользящая статистика одной метрики за окно фиксированной длины
+
+    Каждый замер обрабатывается за O(1) (амортизированно): сумма для
+    среднего, EWMA с постоянной времени, равной длине окна, монотонные
+    очереди для минимума и максимума и эскиз для квантилей. Память
+    ограничена max_samples замерами.
+    """
+
+    def __init__(self, seconds: float, max_samples: int) -> None:
+        """
+        Args:
+            seconds: Длина окна (в секундах)
+            max_samples: Наибольшее количество замеров в окне
+        """
+        self.seconds = seconds
+        self.max_samples = max_samples
+
+        self._samples: deque = deque()      # (время, значение)
+        self._min: deque = deque()          # Возрастающие значения (время, значение)
+        self._max: deque = deque()          # Убывающие значения (время, значение)
+        self._sketch = QuantileSketch()
+        self._sum = 0.0
+        self._ewma: Optional[float] = None
+        self._last_time: Optional[Timestamp] = None
+
+    def _expire(self, now: Timestamp) -> None:
+        """Удаляет замеры, вышедшие из окна или превысившие лимит"""
+        samples = self._samples
+        while samples and (samples[0][0] <= now - self.seconds or len(samples) >= self.max_samples):
+            stamp, value = samples.popleft()
+            self._sum -= value
+            self._sketch.remove(value)
+            if self._min and self._min[0][0] <= stamp:
+                self._min.popleft()
+            if self._max and self._max[0][0] <= stamp:
+                self._max.popleft()
+
+    def add(self, timestamp: Timestamp, value: float) -> None:
+        """Добавляет замер (метки времени должны возрастать)"""
+        self._expire(timestamp)
+
+        self._samples.append((timestamp, value))
+        self._sum += value
+        self._sketch.add(value)
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+
+        if self._ewma is None:
+            self._ewma = value
+        else:
+            alpha = 1 - math.exp(-(timestamp - self._last_time) / self.seconds)
+            self._ewma += alpha * (value - self._ewma)
+        self._last_time = timestamp
+
+        # Сумма с плавающей точкой накапливает ошибку — пересчитываем при опустошении
+        if len(self._samples) == 1:
+            self._sum = value
+
+    def summary(self) -> WindowSummary:
+        """Сводка по замерам в окне"""
+        count = len(self._samples)
+        if not count:
+            nan = math.nan
+            return WindowSummary(0, nan, nan, nan, nan, nan, nan, nan)
+
+        low, high = self._min[0][1], self._max[0][1]
+        # Квантиль эскиза — середина корзины, она может выйти за точные границы
+        p50, p95, p99 = (min(max(q, low), high) for q in self._sketch.quantiles((0.5, 0.95, 0.99)))
+        return WindowSummary(
+            count=count,
+            mean=self._sum / count,
+            ewma=self._ewma,
+            min=low,
+            max=high,
+            p50=p50,
+            p95=p95,
+            p99=p99,
+        )
+
+
+class RollingStats:
+    """
+    Скользящая статистика по метрикам замеров для нескольких окон
+
+    Пополняется в потоке опроса, читается из основного цикла Tk; доступ
+    к окнам защищен замком.
+    """
+
+    def __init__(self, windows: Iterable[float], interval_sec: float, fields: Iterable[str] = STATS_FIELDS) -> None:
+        """
+        Args:
+            windows: Длины окон (в секундах)
+            interval_sec: Наименьший период опроса — задает предел памяти окна
+            fields: Имена полей MetricsSnapshot, по которым ведется статистика
+        """
+        self.windows = tuple(windows)
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, float], RollingWindow] = {
+            (field, seconds): RollingWindow(seconds, math.ceil(seconds / interval_sec) + 1)
+            for field in fields
+            for seconds in self.windows
+        }
+
+    def append(self, snapshot: MetricsSnapshot) -> None:
+        """Учитывает метрики замера во всех окнах"""
+        with self._lock:
+            for (field, _), window in self._windows.items():
+                window.add(snapshot.timestamp, getattr(snapshot, field))
+
+    def summary(self, field: str, seconds: float) -> WindowSummary:
+        """
+        Сводка метрики за окно
+
+        Args:
+            field: Имя метрики (поле MetricsSnapshot)
+            seconds: Длина окна (одно из переданных в конструктор)
+        """
+        with self._lock:
+            return self._windows[(field, seconds)].summary()
@@ -0,0 +1,120 @@
+"""
+Модуль транслитерации русских и украинских названий латиницей
+"""
+
+import re
+from typing import Dict, List
+
+# Русский: система BGN/PCGN без апострофов, как в названиях GeoNames
+# (Yekaterinburg, Nizhniy Novgorod, Naberezhnyye Chelny)
+_RU: Dict[str, str] = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+    "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+# Буквы, которые в начале слова и после гласных передаются с «y»
+_RU_IOTATED: Dict[str, str] = {"е": "ye", "ё": "yo"}
+_RU_VOWELS = set("аеёиоуыэюяъь")
+
+# Украинский: официальная транслитерация 2010 года (Kyiv, Zaporizhzhia)
+_UK: Dict[str, str] = {
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e",
+    "є": "ie", "ж": "zh", "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i",
+    "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "shch", "ь": "", "ю": "iu", "я": "ia", "'": "", "’": "",
+}
+# Буквы, которые в начале слова передаются иначе
+_UK_INITIAL: Dict[str, str] = {"є": "ye", "ї": "yi", "й": "y", "ю": "yu", "я": "ya"}
+
+_UK_LETTERS = set("ґєіїҐЄІЇ")
+_RU_LETTERS = set("ёъыэЁЪЫЭ")
+_CYRILLIC = re.compile("[\u0400-\u04FF]")
+
+
+def has_cyrillic(text: str) -> bool:
+    """Проверяет, есть ли в тексте кириллица"""
+    return _CYRILLIC.search(text) is not None
+
+
+def detect_languages(text: str) -> List[str]:
+    """
+    Возможные языки кириллического названия
+
+    По буквам «і», «ї», «є», «ґ» название определяется как украинское,
+    по «ё», «ъ», «ы», «э» — как русское. Остальные названия могут быть
+    на любом из языков («Суми» и «Сумы»), и русский считается вероятнее.
+
+    Returns:
+        Коды языков в порядке вероятности: ["uk"], ["ru"] или ["ru", "uk"]
+    """
+    letters = set(text)
+    if letters & _UK_LETTERS:
+        return ["uk"]
+    if letters & _RU_LETTERS:
+        return ["ru"]
+    return ["ru", "uk"]
+
+
+def transliterate(text: str, language: str = "ru") -> str:
+    """
+    Транслитерирует название латиницей
+
+    Символы вне таблицы (латиница, цифры, пробелы, дефисы) сохраняются.
+
+    Args:
+        text: Название на русском или украинском
+        language: "ru" или "uk"
+
+    Returns:
+        Название латиницей с заглавными буквами на тех же местах
+    """
+    table = _UK if language == "uk" else _RU
+    result = []
+    previous = ""
+
+    for position, char in enumerate(text):
+        lower = char.lower()
+        initial = not previous or (not previous.isalpha() and previous not in "'’")
+
+        if language == "uk":
+            if lower == "г" and previous.lower() == "з":
+                # «зг» передается как «zgh», чтобы не спутать с «ж»
+                latin = "gh"
+            elif initial and lower in _UK_INITIAL:
+                latin = _UK_INITIAL[lower]
+            else:
+                latin = table.get(lower, char)
+        elif lower in _RU_IOTATED and (initial or previous.lower() in _RU_VOWELS):
+            latin = _RU_IOTATED[lower]
+        else:
+            latin = table.get(lower, char)
+
+        if char != lower and latin:
+            # Заглавная буква: «Щ» -> «Shch», но «ЩЕ» в капслоке -> «SHCHE»
+            following = text[position + 1:position + 2]
+            latin = latin.upper() if following.isupper() else latin.capitalize()
+        result.append(latin)
+        previous = char
+
+    return "".join(result)
+
+
+def transliterations(text: str) -> List[str]:
+    """
+    Варианты написания кириллического названия латиницей
+
+    Если язык названия не определить по буквам, возвращаются оба
+    варианта: сначала русский, затем украинский.
+
+    Args:
+        text: Название
+
+    Returns:
+        Различающиеся варианты в порядке вероятности (пусто, если кириллицы нет)
+    """
+    if not has_cyrillic(text):
+        return []
+    return list(dict.fromkeys(transliterate(text, language) for language in detect_languages(text)))
@@ -0,0 +1,283 @@
+"""
+Модуль получения погоды
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+import requests
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from config import (
+    WEATHER_ICONS,
+    WEATHER_ICONS_NIGHT,
+    WEATHER_CACHE_PRECISION,
+    WEATHER_MODE,
+    WEATHER_SNAPSHOT_FILE,
+)
+from astro import SunTimes
+from breaker import CircuitOpenError
+from http_client import OfflineError
+from providers import Coords, WeatherForecast, WeatherProvider, WeatherReport, create_provider
+
+
+def forecast_covers(forecast: WeatherForecast, moment: float) -> bool:
+    """Проверяет, попадает ли момент в диапазон прогноза"""
+    return forecast.times[0] <= moment <= forecast.times[-1]
+
+
+def interpolate_forecast(forecast: WeatherForecast, moment: float) -> WeatherReport:
+    """
+    Рассчитывает «текущую» погоду по прогнозу
+
+    Температура и ветер интерполируются линейно между соседними точками
+    ряда, код погоды берется из интервала, в который попадает момент.
+
+    Args:
+        forecast: Прогноз
+        moment: Момент времени (UNIX-время), покрытый прогнозом
+
+    Returns:
+        Отчет, действительный до конца ряда прогноза
+    """
+    index = max(int(np.searchsorted(forecast.times, moment, side="right")) - 1, 0)
+    code = forecast.weathercode[index]
+
+    return WeatherReport(
+        weathercode=0 if np.isnan(code) else int(code),
+        temperature=_interpolate_series(forecast.times, forecast.temperature, moment),
+        windspeed=_interpolate_series(forecast.times, forecast.windspeed, moment),
+        fetched_at=forecast.fetched_at,
+        observed_at=moment,
+        expires_at=float(forecast.times[-1]),
+    )
+
+
+def _interpolate_series(times: np.ndarray, values: np.ndarray, moment: float) -> Union[float, str]:
+    """
+    Значение ряда в момент времени, округленное до десятых
+
+    Пропуски (null) не участвуют в интерполяции; у каждого ряда они свои,
+    поэтому ряды интерполируются независимо.
+
+    Returns:
+        Значение или "?", если в ряду нет ни одного значения
+    """
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return "?"
+    return round(float(np.interp(moment, times[valid], values[valid])), 1)
+
+
+def save_snapshot(coords: Sequence[Coords], reports: Sequence[WeatherReport]) -> None:
+    """
+    Сохраняет последние отчеты по всем точкам рядом с config.json
+
+    Файл пишется во временный и атомарно переименовывается, чтобы
+    прерванная запись не оставила поврежденный снимок.
+    """
+    snapshot = {
+        "locations": [
+            {"lat": lat, "lon": lon, "report": report._asdict()}
+            for (lat, lon), report in zip(coords, reports)
+        ]
+    }
+    tmp_file = WEATHER_SNAPSHOT_FILE.with_suffix(".tmp")
+
+    try:
+        with tmp_file.open("w") as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_file, WEATHER_SNAPSHOT_FILE)
+    except OSError as e:
+        logging.warning("Не удалось сохранить снимок погоды: %s", e)
+
+
+def load_snapshot(coords: Sequence[Coords]) -> Dict[Coords, WeatherReport]:
+    """
+    Загружает сохраненные отчеты для координат
+
+    Returns:
+        Словарь «координаты из coords -> отчет» для точек, найденных в снимке
+    """
+    try:
+        with WEATHER_SNAPSHOT_FILE.open("r") as f:
+            snapshot = json.load(f)
+        # Снимок одной точки в прежнем формате — словарь без "locations"
+        entries = snapshot.get("locations", [snapshot])
+        saved = {
+            _round_coords(entry["lat"], entry["lon"]): WeatherReport(**entry["report"])
+            for entry in entries
+        }
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logging.warning("Снимок погоды поврежден: %s", e)
+        return {}
+
+    result = {}
+    for lat, lon in coords:
+        report = saved.get(_round_coords(lat, lon))
+        if report is not None:
+            result[(lat, lon)] = report
+    return result
+
+
+def _round_coords(lat: float, lon: float, precision: int = WEATHER_CACHE_PRECISION) -> Coords:
+    """Координаты, округленные для ключа кэша и сравнения точек"""
+    return round(lat, precision), round(lon, precision)
+
+
+class WeatherCache:
+    """
+    Кэш погоды по округленным координатам
+
+    Текущая погода у источников обновляется раз в 15–60 минут, поэтому
+    повторные запросы до наступления expires_at отчета обслуживаются
+    локально. Счетчики попаданий и промахов доступны через stats().
+
+    В режиме "forecast" кэшируется прогноз на ближайшие часы, а текущие
+    значения интерполируются из него локально. Если обновить прогноз не
+    удалось, виджет продолжает работать на старом, пока тот покрывает
+    текущий момент.
+    """
+
+    def __init__(
+        self,
+        precision: int = WEATHER_CACHE_PRECISION,
+        mode: str = WEATHER_MODE,
+        provider: Optional[WeatherProvider] = None,
+    ) -> None:
+        """
+        Args:
+            precision: Количество знаков после запятой при округлении координат
+            mode: "current" (текущая погода) или "forecast" (интерполяция прогноза)
+            provider: Источник погоды (по умолчанию create_provider())
+        """
+        self.precision = precision
+        self.mode = mode
+        self.provider = provider or create_provider()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._reports: Dict[Tuple[float, float], WeatherReport] = {}
+        self._forecasts: Dict[Tuple[float, float], WeatherForecast] = {}
+
+    def _key(self, lat: float, lon: float) -> Coords:
+        return _round_coords(lat, lon, self.precision)
+
+    async def get(self, coords: Sequence[Coords]) -> List[WeatherReport]:
+        """
+        Возвращает погоду для всех координат из кэша или от API
+
+        Все точки, которых нет в кэше или которые устарели, запрашиваются
+        одним запросом, сколько бы их ни было.
+
+        Args:
+            coords: Пары (широта, долгота)
+
+        Returns:
+            Отчеты в порядке coords
+
+        Raises:
+            requests.RequestException: При промахе и ошибке сети
+            ValueError: При неожиданном формате ответа
+        """
+        if self.mode == "forecast":
+            return await self._get_forecast(coords)
+
+        now = time.time()
+        keys = [self._key(lat, lon) for lat, lon in coords]
+
+        with self._lock:
+            stale = [
+                key for key in dict.fromkeys(keys)
+                if key not in self._reports or now >= self._reports[key].expires_at
+            ]
+            self.hits += len(keys) - len(stale)
+            self.misses += len(stale)
+
+        if stale:
+            reports = await self.provider.fetch_current(stale)
+            with self._lock:
+                self._reports.update(zip(stale, reports))
+
+        with self._lock:
+            return [self._reports[key] for key in keys]
+
+    async def _get_forecast(self, coords: Sequence[Coords]) -> List[WeatherReport]:
+        """Возвращает погоду, интерполированную из кэшированных прогнозов"""
+        now = time.time()
+        keys = [self._key(lat, lon) for lat, lon in coords]
+
+        with self._lock:
+            stale = [
+                key for key in dict.fromkeys(keys)
+                if key not in self._forecasts
+                or now >= self._forecasts[key].expires_at
+                or not forecast_covers(self._forecasts[key], now)
+            ]
+            self.hits += len(keys) - len(stale)
+            self.misses += len(stale)
+
+        if stale:
+            try:
+                forecasts = await self.provider.fetch_forecast(stale)
+                with self._lock:
+                    self._forecasts.update(zip(stale, forecasts))
+            except (requests.RequestException, ValueError) as e:
+                with self._lock:
+                    usable = all(
+                        key in self._forecasts and forecast_covers(self._forecasts[key], now)
+                        for key in stale
+                    )
+                if not usable:
+                    raise
+                # О разомкнутом выключателе и пропаже сети уже сообщено в лог
+                if not isinstance(e, (CircuitOpenError, OfflineError)):
+                    logging.warning("Прогноз не обновлен, используется сохраненный: %s", e)
+
+        with self._lock:
+            return [interpolate_forecast(self._forecasts[key], now) for key in keys]
+
+    def stats(self) -> Tuple[int, int]:
+        """Количество попаданий и промахов"""
+        with self._lock:
+            return self.hits, self.misses
+
+
+def format_weather(report: WeatherReport, daytime: bool = True) -> str:
+    """Текст метки погоды для отчета (ночью — с ночными значками)"""
+    icon = WEATHER_ICONS.get(report.weathercode, "🌐")
+    if not daytime:
+        icon = WEATHER_ICONS_NIGHT.get(report.weathercode, icon)
+    return f"{icon} {report.temperature}°C  {report.windspeed} км/ч"
+
+
+def format_sun(times: SunTimes) -> str:
+    """Восход и закат по местному времени системы: «🌅 07:45 🌇 18:20»"""
+    if times.polar == "day":
+        return "☀ полярный день"
+    if times.polar == "night":
+        return "🌑 полярная ночь"
+    return (
+        f"🌅 {time.strftime('%H:%M', time.localtime(times.sunrise))} "
+        f"🌇 {time.strftime('%H:%M', time.localtime(times.sunset))}"
+    )
+
+
+def format_duration(seconds: float) -> str:
+    """Продолжительность в часах и минутах: «10 ч 25 мин»"""
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60} ч {minutes % 60:02d} мин"
+
+
+def format_age(seconds: float) -> str:
+    """Возраст данных в коротком виде: «40 с», «5 мин», «2 ч»"""
+    if seconds < 60:
+        return f"{int(seconds)} с"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} мин"
+    return f"{int(seconds // 3600)} ч"
@@ -3,26 +3,60 @@
 """
 
 import tkinter as tk
-import requests
+import asyncio
 import logging
-from typing import Optional, Tuple
-import psutil
+import numpy as np
+import requests
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import sys
+import time
 
 from config import (
     setup_logging, 
     load_config, 
     save_config, 
-    WEATHER_ICONS, 
     WEATHER_INTERVAL_SEC, 
+    WEATHER_RENDER_INTERVAL_SEC,
+    WEATHER_DISPLAY,
+    WEATHER_CYCLE_SEC,
+    WEATHER_SHOW_SUN,
+    AIR_QUALITY_ENABLED,
+    AIR_QUALITY_TTL_SEC,
     METRICS_INTERVAL_MS, 
+    METRICS_ADAPTIVE,
+    METRICS_INTERVAL_MIN_MS,
+    METRICS_INTERVAL_MAX_MS,
+    HISTORY_SECONDS,
+    HISTORY_TREND_BINS,
+    STATS_WINDOWS,
     ALPHA_DEFAULT,
-    API_URL
 )
 
+from aio import AsyncLoop
+from air_quality import AirQualityCache, AirQualityReport, format_air_quality
+from astro import is_daytime, sun_times
 from geocode import geocode_city, detect_city_by_ip
+from geocache import cache as geocode_cache
 from tray import create_tray_icon
-from metrics import init_counters, update_metrics
+from metrics import AdaptiveInterval, SamplerThread
+from history import MetricsHistory, sparkline
+from stats import RollingStats
+from scheduler import DeadlineScheduler
+from breaker import CLOSED, CircuitOpenError
+from http_client import OfflineError, client as http_client
+from reachability import ReachabilityMonitor
+from weather import (
+    Coords,
+    WeatherCache,
+    WeatherReport,
+    format_age,
+    format_duration,
+    format_sun,
+    format_weather,
+    load_snapshot,
+    save_snapshot,
+)
 
 class WeatherWidget(tk.Tk):
     """Главное приложение с погодой и системными метриками"""
@@ -33,31 +67,134 @@ class WeatherWidget(tk.Tk):
         self.cfg = load_config()
         self.drag_locked = False
         
-        # Определение и установка города
-        city = self.cfg.get("city") or detect_city_by_ip()
-        self._set_city(city)
-        
         # Инициализация параметров
         self.alpha = self.cfg.get("alpha", ALPHA_DEFAULT)
         self._init_ui()
         self._init_tray()
-        self._init_counters()
+        self._init_sampler()
+        
+        # Сетевые операции — корутины в цикле asyncio рядом с циклом Tk
+        self.aio = AsyncLoop(self)
+        self.aio.start()
+
+        # Пока сети нет, HTTP-клиент отклоняет запросы, не дожидаясь таймаутов
+        self.reachability = ReachabilityMonitor()
+        http_client.online = lambda: self.reachability.online
+        self.reachability.subscribe(lambda online: self.aio.call_in_tk(self._on_network_change, online))
+        self.reachability.start(self.aio.loop)
+
+        # Погода запрашивается через основной и резервный источники
+        self.weather_cache = WeatherCache()
+        self.air_cache = AirQualityCache()
+        self._weather_future: Optional[Future] = None
+        self._resolve_future: Optional[Future] = None
+
+        # Первый кадр рисуется из сохраненного снимка, не дожидаясь сети
+        self.weather_reports: Dict[Coords, WeatherReport] = {}
+        self.air_reports: Dict[Coords, AirQualityReport] = {}
+        self.weather_index = 0
+        self.weather_stale = True
+        self._load_weather_snapshot()
+
+        # Город определяется в фоне, если координаты еще не известны
+        self._start_city_resolution()
         
-        # Запуск обновлений
-        self.after(0, self._update_weather)
-        self.after(0, self._update_metrics)
+        # Запуск обновлений: все периодические задачи идут через общий планировщик
+        self.scheduler = DeadlineScheduler(self)
+        self.scheduler.add("weather", WEATHER_INTERVAL_SEC, self._update_weather)
+        self.scheduler.add("weather_ui", WEATHER_RENDER_INTERVAL_SEC, self._render_weather_label)
+        self.scheduler.add("weather_cycle", WEATHER_CYCLE_SEC, self._cycle_weather, run_now=False)
+        self.scheduler.add("metrics", METRICS_INTERVAL_MS / 1000, self._update_metrics)
 
     def _set_city(self, city: str) -> None:
-        """Установка текущего города и сохранение координат в конфиг"""
+        """Установка текущего города: координаты определяются в фоне и сохраняются в конфиг"""
+
+        def on_done(coords: Optional[Tuple[float, float]], error: Optional[BaseException]) -> None:
+            if coords is not None:
+                self._apply_city(city, *coords)
+
+        self.aio.submit(self._geocode_safe(city), on_done)
+
+    def _locations(self) -> List[Tuple[str, float, float]]:
+        """
+        Точки, для которых показывается погода
+
+        Returns:
+            Список (имя, широта, долгота): основной город и дополнительные
+            точки из "locations" конфига, у которых уже есть координаты
+        """
+        locations = []
+        if self.cfg.get("lat") is not None and self.cfg.get("lon") is not None:
+            locations.append((self.cfg.get("city") or "", self.cfg["lat"], self.cfg["lon"]))
+
+        seen = {(lat, lon) for _, lat, lon in locations}
+        for location in self.cfg.get("locations") or []:
+            coords = (location.get("lat"), location.get("lon"))
+            if None not in coords and coords not in seen:
+                seen.add(coords)
+                locations.append((location.get("name", ""), *coords))
+        return locations
+
+    def _start_city_resolution(self) -> None:
+        """Запуск определения города и координат точек в цикле asyncio"""
+        unresolved = [
+            location for location in self.cfg.get("locations") or []
+            if location.get("lat") is None or location.get("lon") is None
+        ]
+        if self.cfg.get("lat") is not None and self.cfg.get("lon") is not None and not unresolved:
+            return
+        if self._resolve_future is not None and not self._resolve_future.done():
+            return
+        self._resolve_future = self.aio.submit(self._resolve_city())
 
+    async def _resolve_city(self) -> None:
+        """Определение города и координат точек без координат (цикл asyncio)"""
+        if self.cfg.get("lat") is None or self.cfg.get("lon") is None:
+            city = self.cfg.get("city") or await detect_city_by_ip()
+            if not city:
+                logging.warning("Город не задан и не определен по IP")
+            else:
+                coords = await self._geocode_safe(city)
+                if coords is not None:
+                    self.aio.call_in_tk(self._apply_city, city, *coords)
+
+        # Дополнительные точки геокодируются одновременно
+        unresolved = [
+            (index, location.get("name", ""))
+            for index, location in enumerate(self.cfg.get("locations") or [])
+            if location.get("lat") is None or location.get("lon") is None
+        ]
+        found = await asyncio.gather(*(self._geocode_safe(name) for _, name in unresolved))
+        for (index, _), coords in zip(unresolved, found):
+            if coords is not None:
+                self.aio.call_in_tk(self._apply_location, index, *coords)
+
+    async def _geocode_safe(self, city: str) -> Optional[Tuple[float, float]]:
+        """Геокодирование с записью ошибки в лог вместо исключения"""
         try:
-            lat, lon = geocode_city(city)
-            self.cfg.update({"city": city, "lat": lat, "lon": lon})
+            return await geocode_city(city)
+        except (ValueError, requests.RequestException) as e:
+            logging.warning("Не удалось определить координаты для '%s': %s", city, e)
+            return None
 
-        except ValueError:
-            logging.warning("Не удалось определить координаты для '%s'", city)
+    def _apply_city(self, city: str, lat: float, lon: float) -> None:
+        """Применение найденных координат города в основном потоке"""
+        self.cfg.update({"city": city, "lat": lat, "lon": lon})
+        save_config(self.cfg)
+        self.scheduler.run_soon("weather")
 
+    def _apply_location(self, index: int, lat: float, lon: float) -> None:
+        """Применение найденных координат дополнительной точки в основном потоке"""
+        self.cfg["locations"][index].update({"lat": lat, "lon": lon})
         save_config(self.cfg)
+        self.scheduler.run_soon("weather")
+
+    def _load_weather_snapshot(self) -> None:
+        """Отображение сохраненной погоды до первого ответа API"""
+        coords = [(lat, lon) for _, lat, lon in self._locations()]
+        if coords:
+            self.weather_reports = load_snapshot(coords)
+            self._render_weather_label()
 
     def _init_ui(self) -> None:
 
@@ -66,7 +203,7 @@ class WeatherWidget(tk.Tk):
         self.overrideredirect(True)
         self.attributes("-topmost", True)
         self.attributes("-alpha", self.alpha)
-        self.geometry("650x30+100+100")
+        self.geometry("760x30+100+100")
         self.configure(bg="#1a1a1a")
         
         # Сохраните фрейм как атрибут класса
@@ -79,6 +216,15 @@ class WeatherWidget(tk.Tk):
         self.ram_label = self._create_label()
         self.net_label = self._create_label()
         
+        # Всплывающая статистика по метрикам при наведении
+        self._bind_stats_tooltip(self.cpu_label, (("CPU, %", "cpu_percent"),))
+        self._bind_stats_tooltip(self.ram_label, (("RAM, %", "ram_percent"),))
+        self._bind_stats_tooltip(
+            self.net_label, (("↑ KB/s", "sent_speed"), ("↓ KB/s", "recv_speed"))
+        )
+        self._bind_weather_tooltip(self.weather_label)
+        self.stats_tooltip: Optional[tk.Toplevel] = None
+        
         # Кнопка блокировки
         self.lock_button = self._create_lock_button(self.frame)
         
@@ -110,56 +256,276 @@ class WeatherWidget(tk.Tk):
         lock_btn.bind("<Button-1>", self._toggle_lock)
         return lock_btn
 
+    def _bind_stats_tooltip(self, label: tk.Label, fields: Tuple[Tuple[str, str], ...]) -> None:
+        """Привязка всплывающей статистики к метке метрики"""
+        label.bind("<Enter>", lambda _: self._show_tooltip(label, self._stats_lines(fields)))
+        label.bind("<Leave>", lambda _: self._hide_tooltip())
+
+    def _bind_weather_tooltip(self, label: tk.Label) -> None:
+        """Привязка всплывающих сведений о Солнце и состоянии API к метке погоды"""
+        label.bind("<Enter>", lambda _: self._show_tooltip(label, self._weather_lines()))
+        label.bind("<Leave>", lambda _: self._hide_tooltip())
+
+    def _weather_lines(self) -> List[str]:
+        """Строки с восходом, закатом и долготой дня по точкам и состоянием внешних API"""
+        now = time.time()
+        lines = ["Солнце"]
+        for name, lat, lon in self._locations():
+            times = sun_times(lat, lon, now)
+            lines.append(f"  {name or f'{lat}, {lon}'}: {format_sun(times)}, день {format_duration(times.day_length)}")
+
+        lines.append("API")
+        for endpoint, state in sorted(http_client.breaker_states().items()):
+            line = f"  {endpoint:>9}: {state.state}"
+            if state.state != CLOSED:
+                line += f", ошибок подряд {state.failures}, повтор через {format_age(state.retry_in)}"
+            if state.rejected:
+                line += f", отклонено {state.rejected}"
+            lines.append(line)
+        return lines
+
+    def _stats_lines(self, fields: Tuple[Tuple[str, str], ...]) -> List[str]:
+        """Строки скользящей статистики метрик и тренда за всю историю"""
+        lines = []
+        for title, field in fields:
+            lines.append(title)
+            for seconds in STATS_WINDOWS:
+                s = self.stats.summary(field, seconds)
+                window = f"{seconds // 3600} ч" if seconds >= 3600 else f"{seconds // 60} мин"
+                lines.append(
+                    f"  {window:>6}: ср {s.mean:.1f}  EWMA {s.ewma:.1f}  "
+                    f"мин {s.min:.1f}  макс {s.max:.1f}  "
+                    f"p50 {s.p50:.1f}  p95 {s.p95:.1f}  p99 {s.p99:.1f}"
+                )
+            trend = self.history.binned_mean(field, HISTORY_SECONDS, HISTORY_TREND_BINS)
+            if not np.isnan(trend).all():
+                window = f"{HISTORY_SECONDS // 3600} ч"
+                lines.append(
+                    f"  {window:>6}: {sparkline(trend)}  "
+                    f"мин {np.nanmin(trend):.1f}  макс {np.nanmax(trend):.1f}"
+                )
+        return lines
+
+    def _show_tooltip(self, label: tk.Label, lines: List[str]) -> None:
+        """Показ всплывающей подсказки под меткой"""
+        self._hide_tooltip()
+
+        tooltip = tk.Toplevel(self)
+        tooltip.overrideredirect(True)
+        tooltip.attributes("-topmost", True)
+        tooltip.geometry(f"+{label.winfo_rootx()}+{label.winfo_rooty() + label.winfo_height()}")
+        tk.Label(
+            tooltip,
+            text="\n".join(lines),
+            justify=tk.LEFT,
+            bg="#2a2a2a",
+            fg="#ffffff",
+            font=("Consolas", 10)
+        ).pack(padx=6, pady=4)
+        self.stats_tooltip = tooltip
+
+    def _hide_tooltip(self) -> None:
+        """Скрытие всплывающей подсказки"""
+        if self.stats_tooltip is not None:
+            self.stats_tooltip.destroy()
+            self.stats_tooltip = None
+
     def _init_tray(self) -> None:
         """Инициализация иконки в системном трее"""
         self.tray_icon = create_tray_icon(self)
 
-    def _init_counters(self) -> None:
-        """Инициализация счетчиков сетевой активности"""
-        self.last_network_io, self.last_time = init_counters()
+    def _init_sampler(self) -> None:
+        """Запуск фонового потока сбора метрик"""
+        adaptive = None
+        min_interval_ms = METRICS_INTERVAL_MS
+        if METRICS_ADAPTIVE:
+            adaptive = AdaptiveInterval(METRICS_INTERVAL_MIN_MS / 1000, METRICS_INTERVAL_MAX_MS / 1000)
+            min_interval_ms = METRICS_INTERVAL_MIN_MS
+
+        # Быстрый опрос под нагрузкой не сокращает глубину истории: она прореживается до METRICS_INTERVAL_MS
+        self.history = MetricsHistory(
+            HISTORY_SECONDS * 1000 // METRICS_INTERVAL_MS, min_interval=METRICS_INTERVAL_MS / 1000
+        )
+        self.stats = RollingStats(STATS_WINDOWS, min_interval_ms / 1000)
+        self.sampler = SamplerThread(
+            METRICS_INTERVAL_MS / 1000, (self.history, self.stats), adaptive
+        )
+        self.sampler.start()
+        self._last_snapshot = None
+
+    def _on_network_change(self, online: bool) -> None:
+        """Немедленное обновление данных при появлении сети"""
+        if not online:
+            self._render_weather_label()
+            return
+
+        # Выключатели разомкнулись из-за отсутствия сети, а не сбоя API
+        http_client.reset_breakers()
+        self._start_city_resolution()
+        self.scheduler.run_soon("weather")
 
     def _update_weather(self) -> None:
-        """Запрос и отображение данных о погоде"""
-        lat, lon = self.cfg.get("lat"), self.cfg.get("lon")
-        logging.info("Запрос погоды с координатами: lat=%s, lon=%s", lat, lon)
-        
-        if lat is not None and lon is not None:
-            try:
-                response = requests.get(
-                    API_URL,
-                    params={
-                        "latitude": lat,
-                        "longitude": lon,
-                        "current_weather": True,
-                        "timezone": "Europe/Helsinki"
-                    },
-                    timeout=5
-                )
-                data = response.json().get("current_weather", {})
-                
-                icon = WEATHER_ICONS.get(data.get("weathercode", 0), "🌐")
-                temp = data.get("temperature", "?")
-                wind = data.get("windspeed", "?")
-                self.weather_label.config(text=f"{icon} {temp}°C  {wind} m/s")
-                logging.info("Обновлена погода: %s", self.weather_label.cget("text"))
-                
-            except requests.RequestException as e:
-                logging.error("Ошибка погоды: %s", e)
-                
-        # Планирование следующего обновления
-        self.after(WEATHER_INTERVAL_SEC * 1000, self._update_weather)
+        """Запуск запроса погоды и качества воздуха сразу для всех точек (не более одного одновременно)"""
+        if self._weather_future is not None and not self._weather_future.done():
+            return
+
+        coords = tuple((lat, lon) for _, lat, lon in self._locations())
+        if coords:
+            self._weather_future = self.aio.submit(
+                self._fetch_weather(coords),
+                lambda results, error: self._apply_results(coords, results, error),
+            )
+            logging.info("Запрос погоды для точек: %s", coords)
+
+    async def _fetch_weather(self, coords: Sequence[Coords]) -> List[Any]:
+        """
+        Одновременный запрос погоды и качества воздуха
+
+        Обновление длится столько, сколько самый медленный из запросов, а
+        ошибка одного не отменяет другой: на месте неудачного в результате
+        оказывается исключение.
+
+        Returns:
+            Отчеты о погоде и, если включено, о качестве воздуха (или исключения)
+        """
+        fetches = [self.weather_cache.get(coords)]
+        if AIR_QUALITY_ENABLED:
+            fetches.append(self.air_cache.get(coords))
+        return await asyncio.gather(*fetches, return_exceptions=True)
+
+    def _apply_results(
+        self,
+        coords: Sequence[Coords],
+        results: Optional[List[Any]],
+        error: Optional[BaseException],
+    ) -> None:
+        """Раздача результатов одновременного запроса по частям (основной поток)"""
+        if error is not None:
+            logging.error("Ошибка обновления погоды: %s", error)
+            return
+
+        weather, *air = results
+        if isinstance(weather, BaseException):
+            self._apply_weather(coords, None, weather)
+        else:
+            self._apply_weather(coords, weather, None)
+        if air:
+            if isinstance(air[0], BaseException):
+                self._apply_air_quality(coords, None, air[0])
+            else:
+                self._apply_air_quality(coords, air[0], None)
+
+    def _apply_weather(
+        self,
+        coords: Sequence[Coords],
+        reports: Optional[List[WeatherReport]],
+        error: Optional[BaseException],
+    ) -> None:
+        """Прием результата запроса погоды в основном потоке"""
+        if isinstance(error, (CircuitOpenError, OfflineError)):
+            # Переходы выключателя уже записаны в лог, отказы без сети — нет
+            logging.debug("Погода не запрошена: %s", error)
+            return
+        if error is not None:
+            logging.error("Ошибка погоды: %s", error)
+            return
+
+        fresh = dict(zip(coords, reports))
+        # В режиме прогноза новые отчеты строятся каждый такт — на диск
+        # пишется только действительно новый ответ API
+        if any(
+            point not in self.weather_reports
+            or report.fetched_at != self.weather_reports[point].fetched_at
+            for point, report in fresh.items()
+        ):
+            self.aio.submit(asyncio.to_thread(save_snapshot, coords, reports))
+            logging.info("Обновлена погода: %s", [format_weather(r) for r in reports])
+
+        self.weather_reports = fresh
+        self.weather_stale = False
+        self._render_weather_label()
+
+    def _apply_air_quality(
+        self,
+        coords: Sequence[Coords],
+        reports: Optional[List[AirQualityReport]],
+        error: Optional[BaseException],
+    ) -> None:
+        """Прием результата запроса качества воздуха (прежние значения остаются при ошибке)"""
+        if isinstance(error, (CircuitOpenError, OfflineError)):
+            logging.debug("Качество воздуха не запрошено: %s", error)
+            return
+        if error is not None:
+            logging.warning("Ошибка качества воздуха: %s", error)
+            return
+
+        if any(
+            point not in self.air_reports or report.fetched_at != self.air_reports[point].fetched_at
+            for point, report in zip(coords, reports)
+        ):
+            logging.info("Обновлено качество воздуха: %s", [format_air_quality(r) for r in reports])
+        self.air_reports = dict(zip(coords, reports))
+        self._render_weather_label()
+
+    def _cycle_weather(self) -> None:
+        """Переключение на следующую точку в режиме поочередного показа"""
+        self.weather_index += 1
+        self._render_weather_label()
+
+    def _render_weather_label(self) -> None:
+        """Отображение последних удачных отчетов о погоде"""
+        shown = [
+            (name, lat, lon, self.weather_reports[(lat, lon)])
+            for name, lat, lon in self._locations()
+            if (lat, lon) in self.weather_reports
+        ]
+        several = len(shown) > 1
+        if WEATHER_DISPLAY == "cycle" and shown:
+            shown = [shown[self.weather_index % len(shown)]]
+
+        # Снимок с диска и не обновленные вовремя данные показываются с возрастом
+        now = time.time()
+        parts = []
+        for name, lat, lon, report in shown:
+            # Восход и закат считаются локально и кэшируются на сутки
+            text = format_weather(report, is_daytime(lat, lon, now))
+            if several and name:
+                text = f"{name}: {text}"
+            # Качество воздуха показывается, пока не устарело еще на один период
+            air = self.air_reports.get((lat, lon))
+            if air is not None and now < air.expires_at + AIR_QUALITY_TTL_SEC:
+                text += f"  {format_air_quality(air)}"
+            if WEATHER_SHOW_SUN:
+                text += f"  {format_sun(sun_times(lat, lon, now))}"
+            if self.weather_stale or now > report.expires_at + WEATHER_INTERVAL_SEC * 2:
+                text += f" ({format_age(now - report.fetched_at)} назад)"
+            parts.append(text)
+
+        # Отсутствие сети и разомкнутые выключатели всех источников погоды видны прямо на панели
+        states = http_client.breaker_states()
+        breakers = [states.get(endpoint) for endpoint in self.weather_cache.provider.endpoints]
+        if not self.reachability.online:
+            parts.append("⚠ нет сети")
+        elif breakers and all(state is not None and state.state != CLOSED for state in breakers):
+            parts.append(f"⚠ API {format_age(min(state.retry_in for state in breakers))}")
+
+        if parts:
+            self.weather_label.config(text="  |  ".join(parts))
 
     def _update_metrics(self) -> None:
-        """Обновление системных метрик (CPU, RAM, сеть)"""
+        """Отображение последнего замера системных метрик (CPU, RAM, сеть)"""
 
-        cpu, ram, sent, recv, now = update_metrics(self.last_network_io, self.last_time)
-        self.last_network_io, self.last_time = psutil.net_io_counters(), now
-        
-        self.cpu_label.config(text=f"CPU: {cpu:.1f}%")
-        self.ram_label.config(text=f"RAM: {ram:.1f}%")
-        self.net_label.config(text=f"Net: ↑{sent:.1f} ↓{recv:.1f} KB/s")
+        # Метки обновляются, только если поток опроса опубликовал новый замер
+        snap = self.sampler.latest()
+        if snap is not None and snap is not self._last_snapshot:
+            self._last_snapshot = snap
+            self.cpu_label.config(text=f"CPU: {snap.cpu_percent:.1f}% (max {snap.cpu_max_core:.0f}%)")
+            self.ram_label.config(text=f"RAM: {snap.ram_percent:.1f}%")
+            self.net_label.config(text=f"Net: ↑{snap.sent_speed:.1f} ↓{snap.recv_speed:.1f} KB/s")
         
-        self.after(METRICS_INTERVAL_MS, self._update_metrics)
+        # В простое поток опроса замедляется — метки опрашиваются не чаще него
+        period = max(METRICS_INTERVAL_MS / 1000, self.sampler.interval_sec)
+        self.scheduler.set_period("metrics", period)
 
     def _open_settings(self) -> None:
         """Открытие окна настроек приложения"""
@@ -220,7 +586,22 @@ class WeatherWidget(tk.Tk):
 
     def _quit(self) -> None:
         """Завершение работы приложения"""
+        for name, stats in self.scheduler.stats().items():
+            logging.info(
+                "Задача '%s': запусков %d, период %.3f с (задан %.3f с), джиттер %.1f мс, пропусков %d",
+                name, stats.runs, stats.actual_period, stats.period, stats.jitter * 1000, stats.overruns
+            )
+        http_client.log_stats()
+        self.weather_cache.provider.log_stats()
+        logging.info("Кэш погоды: попаданий %d, промахов %d", *self.weather_cache.stats())
+        logging.info("Кэш качества воздуха: попаданий %d, промахов %d", *self.air_cache.stats())
+        logging.info("Кэш геокодирования: попаданий %d, промахов %d", geocode_cache.hits, geocode_cache.misses)
+        geocode_cache.save()    # Порядок использования записей для вытеснения после перезапуска
+        self.scheduler.stop()
         self.tray_icon.stop()
+        self.sampler.stop()
+        self.reachability.stop()
+        self.aio.stop()
         self.destroy()
         sys.exit(0)
 